@@ -1,356 +1,95 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import requests
+import hashlib
 import os
-try:
-    from statsmodels.tsa.filters.hp_filter import hpfilter
-except ImportError:
-    st.error("The 'statsmodels' library is not installed. Please install it using 'pip install statsmodels'.")
-    st.stop()
+from registry import COUNTRIES, ECONOMIC_INDICATORS
+from metrics import span, start_metrics_server
 
-# FRED API Key
-FRED_API_KEY = "467fe69919c067bbe2cf724fd86c501e"
+# Prometheus /metrics endpoint on ECONCENTR_METRICS_PORT, if set
+start_metrics_server()
 
-# Dictionary of countries and their FRED country codes
-COUNTRIES = {
-    'Ghana': 'GHA',
-    'Nigeria': 'NGA',
-    'Kenya': 'KEN'
-}
+# Serve the Our Data tab from local data/ snapshots and refresh FRED in the background.
+# Set ECONCENTR_LOCAL_FIRST=0 to block on FRED instead.
+LOCAL_FIRST = os.environ.get('ECONCENTR_LOCAL_FIRST', '1') == '1'
 
-# Dictionary of economic indicators with exact FRED series IDs per country
-ECONOMIC_INDICATORS = {
-    'Ghana': {
-        'inflation': 'FPCPITOTLZGGHA',
-        'gdp': 'MKTGDPGHA646NWDB',
-        'gdp_growth': 'GHANGDPRPCPPPT',
-        'youth_unemployment': 'SLUEM1524ZSGHA',
-        'lending_rate': 'DDDI12GHA156NWDB',
-        'deposit_rate': 'DDDI01GHA156NWDB'
-    },
-    'Nigeria': {
-        'inflation': 'FPCPITOTLZGNGA',
-        'gdp': 'MKTGDPNGA646NWDB',
-        'gdp_per_capita': 'NYGDPPCAPCDNGA',
-        'gdp_growth': 'NGANGDPRPCPPPT',
-        'unemployment': 'SLUEMTOTLZSNGA',
-        'youth_unemployment': 'SLUEM1524ZSNGA',
-        'lending_rate': 'DDDI12NGA156NWDB',
-        'deposit_rate': 'DDDI01NGA156NWDB',
-        'exchange_rate': 'EXNGUS',
-        'current_account_balance_percent_gdp': 'BPBLTT01NGA637S'
-    },
-    'Kenya': {
-        'inflation': 'FPCPITOTLZGKEN',
-        'gdp': 'MKTGDPKEA646NWDB',
-        'gdp_per_capita': 'NYGDPPCAPCDKEN',
-        'gdp_growth': 'KENNGDPRPCPPPT',
-        'unemployment': 'SLUEMTOTLZSKEN',
-        'youth_unemployment': 'SLUEM1524ZSKEN',
-        'lending_rate': 'DDDI12KEA156NWDB',
-        'deposit_rate': 'DDDI01KEA156NWDB',
-        'exchange_rate': 'EXKZUS',
-        'current_account_balance_percent_gdp': 'BPBLTT01KEA637S'
-    }
-}
+# Only fetch, decompose and chart the indicators picked in the Our Data tab.
+# Set ECONCENTR_LAZY_CHARTS=0 to render every indicator of the selected country.
+LAZY_CHARTS = os.environ.get('ECONCENTR_LAZY_CHARTS', '1') == '1'
 
-# Dictionary of chart colors per country
-CHART_COLORS = {
-    'Ghana': {
-        'light': {'actual': '#28a745', 'trend': '#28a745', 'cycle': '#218838'},
-        'dark': {'actual': '#20c997', 'trend': '#20c997', 'cycle': '#17a2b8'}
-    },
-    'Nigeria': {
-        'light': {'actual': '#1a73e8', 'trend': '#1a73e8', 'cycle': '#6610f2'},
-        'dark': {'actual': '#00ffcc', 'trend': '#00ffcc', 'cycle': '#ffeb3b'}
-    },
-    'Kenya': {
-        'light': {'actual': '#6610f2', 'trend': '#6610f2', 'cycle': '#6f42c1'},
-        'dark': {'actual': '#ffeb3b', 'trend': '#ffeb3b', 'cycle': '#ffd700'}
-    }
-}
+# Default chart layout of the Our Data tab: one chart per view, or every indicator of the
+# country packed into one dashboard grid figure. Set ECONCENTR_DASHBOARD_GRID=1 to default to the grid.
+DASHBOARD_GRID = os.environ.get('ECONCENTR_DASHBOARD_GRID', '0') == '1'
 
-# Function to fetch FRED data for a specific country
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_fred_data(country, series_dict):
-    os.makedirs('data', exist_ok=True)
+# Function to fetch FRED data for a specific country.
+# In incremental mode only observations newer than the local snapshot are requested and appended.
+# Returns immutable ArraySeries, cached as shared resources so sessions do not each get a copy.
+@st.cache_resource(ttl=300)  # Cache for 5 minutes
+def fetch_fred_data(country, series_dict, incremental=True):
+    from snapshots import share_series, sync_country
     data_frames = {}
     if country not in series_dict or not series_dict[country]:
         st.warning(f"No series IDs defined for {country}. Please contact the developer to update the series IDs.")
         return data_frames
-    for indicator_name, series_id in series_dict[country].items():
-        url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={FRED_API_KEY}&file_type=json"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json().get('observations', [])
-            if not data:
-                st.warning(f"No data available for {indicator_name.replace('_', ' ').title()} in {country}.")
-                continue
-            df = pd.DataFrame(data)[['date', 'value']]
-            df['value'] = pd.to_numeric(df['value'], errors='coerce')
-            df['date'] = pd.to_datetime(df['date'])
-            csv_path = f'data/{indicator_name}_{country}.csv'
-            df.to_csv(csv_path, index=False)
-            data_frames[indicator_name] = df
-        except requests.exceptions.RequestException as e:
-            st.warning(f"Failed to fetch {indicator_name.replace('_', ' ').title()} for {country}: {str(e)}")
-            continue
+    data_frames, errors = sync_country(country, series_dict[country], incremental)
+    for indicator_name in series_dict[country]:
+        if indicator_name in errors:
+            st.warning(f"Failed to fetch {indicator_name.replace('_', ' ').title()} for {country}: {str(errors[indicator_name])}")
+        elif indicator_name not in data_frames:
+            st.warning(f"No data available for {indicator_name.replace('_', ' ').title()} in {country}.")
+    return share_series(country, data_frames)
+
+# Function to load a country's data without waiting on the network
+def load_local_first(country, series_dict):
+    from snapshots import get_country_data, is_refreshing, last_refresh_errors
+    if country not in series_dict or not series_dict[country]:
+        st.warning(f"No series IDs defined for {country}. Please contact the developer to update the series IDs.")
+        return {}
+    data_frames = get_country_data(country, series_dict[country])
+    for indicator_name, error in last_refresh_errors(country).items():
+        st.warning(f"Failed to refresh {indicator_name.replace('_', ' ').title()} for {country}: {str(error)}")
+    for indicator_name in series_dict[country]:
+        if indicator_name not in data_frames and is_refreshing(country, indicator_name):
+            st.info(f"Fetching {indicator_name.replace('_', ' ').title()} for {country} from FRED in the background. Reload the page in a moment.")
     return data_frames
 
-# Custom CSS for website-like design with centered headers
+# Function to restrict a series to the (start, end) zoom window, if any
+def zoom_window(series, zoom):
+    if not zoom:
+        return series
+    return series.window(*zoom)
+
+# The Our Data widgets are only drawn while the tab is open and Streamlit forgets the
+# state of widgets that are not drawn, so their values are also kept under saved_<key>
+# and the widgets are seeded from them when the tab is opened again
+def saved_value(key, default):
+    return st.session_state.get(f"saved_{key}", default)
+
+def save_value(key, value):
+    st.session_state[f"saved_{key}"] = value
+    return value
+
+# Custom CSS for website-like design with centered headers.
+# The stylesheets live in static/ and are served by Streamlit's static file server
+# (server.enableStaticServing in .streamlit/config.toml), so the browser fetches and
+# caches them once instead of receiving the CSS again on every rerun.
+THEME_STYLESHEETS = {"Light": "theme_light.css", "Dark": "theme_dark.css"}
+
+# Function to read a theme stylesheet once per server process, with a content hash for cache busting
+@st.cache_resource
+def load_theme_stylesheet(theme):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", THEME_STYLESHEETS[theme])) as f:
+        css = f.read()
+    return css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+
 if selected_theme := st.sidebar.radio("Select Theme", ["Light", "Dark"], key="theme_selector"):
-    if selected_theme == "Light":
+    css, css_version = load_theme_stylesheet(selected_theme)
+    # Linked from app/static when static serving is on, so browsers cache it; inlined otherwise
+    if st.get_option("server.enableStaticServing"):
         st.markdown(
-            """
-            <style>
-            .stApp {
-                background-color: #f5f5f5;
-                color: #1a1a1a;
-                font-family: 'EB Garamond', Garamond, serif;
-                margin: 0;
-                padding: 0;
-            }
-            .main-header {
-                background-color: #ffffff;
-                padding: 20px 40px;
-                border-bottom: 2px solid #1a73e8;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                margin-bottom: 30px;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                text-align: center;
-            }
-            .main-header h1 {
-                font-family: 'EB Garamond', Garamond, serif;
-                font-size: 36px;
-                font-weight: 700;
-                color: #1a73e8;
-                margin: 0;
-                text-align: center;
-            }
-            .main-header p {
-                font-size: 20px;
-                color: #4a4a4a;
-                margin: 10px 0 0;
-                font-family: 'EB Garamond', Garamond, serif;
-                text-align: center;
-            }
-            .stPlotlyChart {
-                background-color: #ffffff;
-                border-radius: 10px;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-                padding: 20px;
-                margin-bottom: 30px;
-            }
-            .stTabs [data-baseweb="tab-list"] {
-                background-color: #ffffff;
-                padding: 15px;
-                border-radius: 8px;
-                border-bottom: 1px solid #d3d3d3;
-                margin-bottom: 30px;
-                display: flex;
-                justify-content: center;
-            }
-            .stTabs [data-baseweb="tab"] {
-                color: #1a1a1a;
-                font-family: 'EB Garamond', Garamond, serif;
-                font-size: 22px;
-                font-weight: 600;
-                padding: 15px 30px;
-                margin: 0 10px;
-                border-radius: 8px;
-                transition: background-color 0.3s ease;
-            }
-            .stTabs [data-baseweb="tab"][aria-selected="true"] {
-                background-color: #1a73e8;
-                color: #ffffff;
-                border-bottom: 4px solid #135ab6;
-            }
-            .stTabs [data-baseweb="tab"]:hover {
-                background-color: #e6f0fa;
-            }
-            h1, h2, h3 {
-                font-family: 'EB Garamond', Garamond, serif;
-                color: #1a1a1a;
-                text-align: center;
-                display: flex;
-                justify-content: center;
-                width: 100%;
-            }
-            h2 {
-                font-size: 28px;
-                font-weight: 600;
-                margin-bottom: 20px;
-            }
-            .stMarkdown p {
-                font-size: 20px;
-                line-height: 1.8;
-                color: #1a1a1a;
-                margin-bottom: 20px;
-                text-align: center;
-            }
-            .stSelectbox label {
-                font-size: 20px;
-                color: #1a1a1a;
-                font-weight: 600;
-                text-align: center;
-                display: block;
-            }
-            .sidebar .sidebar-content {
-                background-color: #ffffff;
-                padding: 20px;
-                border-radius: 8px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                margin: 20px;
-            }
-            .sidebar .stRadio > label {
-                font-size: 20px;
-                color: #1a1a1a;
-                text-align: center;
-            }
-            .footer {
-                background-color: #ffffff;
-                padding: 20px 40px;
-                border-top: 1px solid #d3d3d3;
-                text-align: center;
-                margin-top: 40px;
-            }
-            .footer p {
-                font-size: 18px;
-                color: #4a4a4a;
-            }
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
-    else:  # Dark
-        st.markdown(
-            """
-            <style>
-            .stApp {
-                background-color: #1c2526;
-                color: #e6e6e6;
-                font-family: 'EB Garamond', Garamond, serif;
-                margin: 0;
-                padding: 0;
-            }
-            .main-header {
-                background-color: #2a2a2a;
-                padding: 20px 40px;
-                border-bottom: 2px solid #00ffcc;
-                box-shadow: 0 4px 6px rgba(0,0,0,0.3);
-                margin-bottom: 30px;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                text-align: center;
-            }
-            .main-header h1 {
-                font-family: 'EB Garamond', Garamond, serif;
-                font-size: 36px;
-                font-weight: 700;
-                color: #00ffcc;
-                margin: 0;
-                text-align: center;
-            }
-            .main-header p {
-                font-size: 20px;
-                color: #b0b0b0;
-                margin: 10px 0 0;
-                font-family: 'EB Garamond', Garamond, serif;
-                text-align: center;
-            }
-            .stPlotlyChart {
-                background-color: #2a2a2a;
-                border-radius: 10px;
-                box-shadow: 0 4px 8px rgba(0,0,0,0.3);
-                padding: 20px;
-                margin-bottom: 30px;
-            }
-            .stTabs [data-baseweb="tab-list"] {
-                background-color: #2a2a2a;
-                padding: 15px;
-                border-radius: 8px;
-                border-bottom: 1px solid #555555;
-                margin-bottom: 30px;
-                display: flex;
-                justify-content: center;
-            }
-            .stTabs [data-baseweb="tab"] {
-                color: #e6e6e6;
-                font-family: 'EB Garamond', Garamond, serif;
-                font-size: 22px;
-                font-weight: 600;
-                padding: 15px 30px;
-                margin: 0 10px;
-                border-radius: 8px;
-                transition: background-color 0.3s ease;
-            }
-            .stTabs [data-baseweb="tab"][aria-selected="true"] {
-                background-color: #00ffcc;
-                color: #1c2526;
-                border-bottom: 4px solid #00ccaa;
-            }
-            .stTabs [data-baseweb="tab"]:hover {
-                background-color: #4a4a4a;
-            }
-            h1, h2, h3 {
-                font-family: 'EB Garamond', Garamond, serif;
-                color: #e6e6e6;
-                text-align: center;
-                display: flex;
-                justify-content: center;
-                width: 100%;
-            }
-            h2 {
-                font-size: 28px;
-                font-weight: 600;
-                margin-bottom: 20px;
-            }
-            .stMarkdown p {
-                font-size: 20px;
-                line-height: 1.8;
-                color: #e6e6e6;
-                margin-bottom: 20px;
-                text-align: center;
-            }
-            .stSelectbox label {
-                font-size: 20px;
-                color: #e6e6e6;
-                font-weight: 600;
-                text-align: center;
-                display: block;
-            }
-            .sidebar .sidebar-content {
-                background-color: #2a2a2a;
-                padding: 20px;
-                border-radius: 8px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.3);
-                margin: 20px;
-            }
-            .sidebar .stRadio > label {
-                font-size: 20px;
-                color: #e6e6e6;
-                text-align: center;
-            }
-            .footer {
-                background-color: #2a2a2a;
-                padding: 20px 40px;
-                border-top: 1px solid #555555;
-                text-align: center;
-                margin-top: 40px;
-            }
-            .footer p {
-                font-size: 18px;
-                color: #b0b0b0;
-            }
-            </style>
-            """,
+            f'<link rel="stylesheet" href="app/static/{THEME_STYLESHEETS[selected_theme]}?v={css_version}">',
             unsafe_allow_html=True
         )
+    else:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 # Header
 st.markdown(
@@ -363,71 +102,10 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Tabs
-about_tab, data_tab, thoughts_tab, partners_tab = st.tabs(["About Us", "Our Data", "Econ Thoughts", "Partners"])
-
-# Common Plotly layout settings with watermark
-def apply_chart_layout(fig, title, theme):
-    fig.update_layout(
-        title={
-            'text': title,
-            'y': 0.95,
-            'x': 0.5,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': {
-                'size': 28,
-                'family': 'EB Garamond, Garamond, serif',
-                'color': '#1a1a1a' if theme == "Light" else '#e6e6e6',
-                'weight': 'bold'
-            }
-        },
-        width=1100,
-        height=700,
-        margin=dict(l=80, r=80, t=120, b=80),
-        plot_bgcolor='#ffffff' if theme == "Light" else '#2a2a2a',
-        paper_bgcolor='#ffffff' if theme == "Light" else '#2a2a2a',
-        font=dict(
-            family='EB Garamond, Garamond, serif',
-            color='#1a1a1a' if theme == "Light" else '#e6e6e6',
-            size=18
-        ),
-        xaxis=dict(
-            tickfont=dict(
-                family='EB Garamond, Garamond, serif',
-                color='#1a1a1a' if theme == "Light" else '#e6e6e6',
-                size=16
-            ),
-            gridcolor='#d3d3d3' if theme == "Light" else '#555555',
-            zerolinecolor='#d3d3d3' if theme == "Light" else '#555555'
-        ),
-        yaxis=dict(
-            tickfont=dict(
-                family='EB Garamond, Garamond, serif',
-                color='#1a1a1a' if theme == "Light" else '#e6e6e6',
-                size=16
-            ),
-            gridcolor='rgba(0,0,0,0)',  # Remove horizontal grid lines
-            zerolinecolor='#d3d3d3' if theme == "Light" else '#555555'
-        ),
-        annotations=[
-            dict(
-                text="EconCentr by Osman John Froko",
-                x=0.98,
-                y=0.02,
-                xref="paper",
-                yref="paper",
-                showarrow=False,
-                font=dict(
-                    family='EB Garamond, Garamond, serif',
-                    size=10,
-                    color='#999999' if theme == "Light" else '#666666'
-                ),
-                opacity=0.3
-            )
-        ]
-    )
-    return fig
+# Tabs. on_change="rerun" makes them lazy: only the open tab's content runs, so landing
+# on About Us does not pay for loading data, pandas, scipy or plotly.
+SECTIONS = ["About Us", "Our Data", "Econ Thoughts", "Partners"]
+about_tab, data_tab, thoughts_tab, partners_tab = st.tabs(SECTIONS, key="section_tabs", on_change="rerun")
 
 # About Us Tab
 with about_tab:
@@ -440,67 +118,163 @@ with about_tab:
     We envision EconCentr as a leading hub for open, inclusive, and thought-provoking discussions in Economics. By offering a space for both seasoned professionals and emerging thinkers to share their perspectives, we strive to inspire informed policy-making and innovative solutions that drive economic progress worldwide.
     """)
 
-# Our Data Tab
-with data_tab:
-    st.subheader("Economic Indicators")
-    st.caption("Data sourced from FRED (Federal Reserve Economic Data)")
+# Our Data Tab; the data stack is imported the first time the tab is opened
+if data_tab.open:
+    with data_tab:
+        from decomposition import HP_LAMBDA, hp_filter_memoized
+        from charts import CHART_COLORS, get_dashboard, get_figure
+        from downsample import POINT_BUDGET
+        from transforms import TRANSFORMS, run_transforms, targets
+        import pandas as pd
+        
+        st.subheader("Economic Indicators")
+        st.caption("Data sourced from FRED (Federal Reserve Economic Data)")
     
-    # Country selection dropdown
-    selected_country = st.selectbox("Select Country", sorted(list(COUNTRIES.keys())), key="country_selector")
+        # Country selection dropdown
+        countries = sorted(list(COUNTRIES.keys()))
+        selected_country = save_value("country_selector", st.selectbox(
+            "Select Country", countries, index=countries.index(saved_value("country_selector", countries[0])),
+            key="country_selector"
+        ))
     
-    # Fetch data for the selected country
-    data_frames = fetch_fred_data(selected_country, ECONOMIC_INDICATORS)
+        # Indicator selection; in lazy mode only the picked indicators are loaded and charted
+        country_indicators = ECONOMIC_INDICATORS.get(selected_country, {})
+        if LAZY_CHARTS:
+            indicator_key = f"indicator_selector_{selected_country}"
+            selected_indicators = save_value(indicator_key, st.multiselect(
+                "Select Indicators",
+                list(country_indicators),
+                default=[name for name in saved_value(indicator_key, list(country_indicators)[:1]) if name in country_indicators],
+                format_func=lambda name: name.replace('_', ' ').title(),
+                key=indicator_key
+            ))
+            requested = {selected_country: {name: country_indicators[name] for name in selected_indicators}}
+        else:
+            requested = ECONOMIC_INDICATORS
     
-    if not data_frames:
-        st.warning(f"No data available for {selected_country}. Please select another country or contact the developer to update series IDs.")
-    else:
-        for indicator, df in data_frames.items():
-            if df.empty:
-                continue
-            df = df.dropna(subset=['value'])
-            if len(df) == 0:
-                continue
+        # Fetch data for the selected country
+        data_frames = {}
+        if not requested.get(selected_country):
+            st.info("Select one or more indicators to view their charts.")
+        elif LOCAL_FIRST:
+            with span('load_data', country=selected_country, mode='local_first'):
+                data_frames = load_local_first(selected_country, requested)
+        else:
+            with span('load_data', country=selected_country, mode='blocking'):
+                data_frames = fetch_fred_data(selected_country, requested)
+    
+        if not data_frames and requested.get(selected_country):
+            st.warning(f"No data available for {selected_country}. Please select another country or contact the developer to update series IDs.")
+        elif data_frames:
+            # Drop missing values and decompose every series with more than 4 points in one batch.
+            # The series are shared, read-only ArraySeries; dropna and zooming return views and
+            # trend/cycle are attached as derived arrays, so nothing is copied per session.
+            with span('decompose', country=selected_country):
+                data_frames = {indicator: series.dropna() for indicator, series in data_frames.items()}
+                decomposed = hp_filter_memoized(
+                    {indicator: series.values for indicator, series in data_frames.items() if len(series) > 4},
+                    lamb=HP_LAMBDA
+                )
+        
+            # Zoom window for long series; charts are downsampled to POINT_BUDGET points
+            # within the window, so narrowing it brings back full resolution
+            zoom = None
+            if any(len(series) > POINT_BUDGET for series in data_frames.values()):
+                first_date = pd.Timestamp(min(series.dates[0] for series in data_frames.values() if len(series))).to_pydatetime()
+                last_date = pd.Timestamp(max(series.dates[-1] for series in data_frames.values() if len(series))).to_pydatetime()
+                zoom_start, zoom_end = saved_value(f"zoom_{selected_country}", (first_date, last_date))
+                zoom = save_value(f"zoom_{selected_country}", st.slider(
+                    "Zoom", min_value=first_date, max_value=last_date,
+                    value=(max(zoom_start, first_date), min(zoom_end, last_date)), format="YYYY-MM-DD",
+                    key=f"zoom_{selected_country}"
+                ))
+        
+            colors = CHART_COLORS[selected_country][selected_theme.lower()]
+            layouts = ["Charts", "Dashboard grid"]
+            layout = save_value("chart_layout", st.radio(
+                "Layout", layouts, index=layouts.index(saved_value("chart_layout", layouts[1 if DASHBOARD_GRID else 0])),
+                horizontal=True, key="chart_layout"
+            ))
+        
+            # Dashboard grid: every indicator's actual/trend/cycle in one figure and one payload
+            if layout == "Dashboard grid":
+                panels = {}
+                for indicator, series in data_frames.items():
+                    if len(series) == 0:
+                        continue
+                    if indicator in decomposed:
+                        cycle, trend = decomposed[indicator]
+                        series = series.with_derived(trend=trend, cycle=cycle)
+                    panels[indicator] = zoom_window(series, zoom)
+                if panels:
+                    fig_grid = get_dashboard(selected_country, selected_theme,
+                                             {indicator: view.to_frame() for indicator, view in panels.items()}, colors,
+                                             versions={indicator: view.version for indicator, view in panels.items()})
+                    with span('plotly_chart', country=selected_country, indicator='*', view='dashboard'):
+                        st.plotly_chart(fig_grid, use_container_width=True)
+            
+            else:
+                # One styled chart per view
+                for indicator, series in data_frames.items():
+                    if len(series) == 0:
+                        continue
             
-            # Actual Data Chart
-            fig_actual = px.area(df, x='date', y='value',
-                                 labels={'value': 'Value', 'date': 'Date'})
-            fig_actual.update_traces(
-                fill='tozeroy',
-                line_color=CHART_COLORS[selected_country][selected_theme.lower()]['actual']
-            )
-            fig_actual = apply_chart_layout(fig_actual, f"{indicator.replace('_', ' ').title()} Actual Data", selected_theme)
-            st.plotly_chart(fig_actual, use_container_width=True)
+                    # Actual Data Chart
+                    view = zoom_window(series, zoom)
+                    fig_actual = get_figure(selected_country, indicator, selected_theme, 'actual', view.to_frame(), colors['actual'],
+                                            version=view.version)
+                    with span('plotly_chart', country=selected_country, indicator=indicator, view='actual'):
+                        st.plotly_chart(fig_actual, use_container_width=True)
             
-            if len(df) > 4:
-                try:
-                    cycle, trend = hpfilter(df['value'], lamb=6.25)
-                    df['trend'] = trend
-                    df['cycle'] = cycle
-                    col1, col2 = st.columns(2)
+                    if indicator in decomposed:
+                        try:
+                            cycle, trend = decomposed[indicator]
+                            df = zoom_window(series.with_derived(trend=trend, cycle=cycle), zoom).to_frame()
+                            col1, col2 = st.columns(2)
                     
-                    # Trend Chart
-                    with col1:
-                        fig_trend = px.area(df, x='date', y='trend',
-                                            labels={'trend': 'Trend Value', 'date': 'Date'})
-                        fig_trend.update_traces(
-                            fill='tozeroy',
-                            line_color=CHART_COLORS[selected_country][selected_theme.lower()]['trend']
-                        )
-                        fig_trend = apply_chart_layout(fig_trend, f"{indicator.replace('_', ' ').title()} Trend", selected_theme)
-                        st.plotly_chart(fig_trend, use_container_width=True)
+                            # Trend Chart
+                            with col1:
+                                fig_trend = get_figure(selected_country, indicator, selected_theme, 'trend', df, colors['trend'])
+                                with span('plotly_chart', country=selected_country, indicator=indicator, view='trend'):
+                                    st.plotly_chart(fig_trend, use_container_width=True)
                     
-                    # Cyclical Chart
-                    with col2:
-                        fig_cycle = px.area(df, x='date', y='cycle',
-                                            labels={'cycle': 'Cyclical Value', 'date': 'Date'})
-                        fig_cycle.update_traces(
-                            fill='tozeroy',
-                            line_color=CHART_COLORS[selected_country][selected_theme.lower()]['cycle']
-                        )
-                        fig_cycle = apply_chart_layout(fig_cycle, f"{indicator.replace('_', ' ').title()} Cyclical", selected_theme)
-                        st.plotly_chart(fig_cycle, use_container_width=True)
-                except Exception:
-                    pass
+                            # Cyclical Chart
+                            with col2:
+                                fig_cycle = get_figure(selected_country, indicator, selected_theme, 'cycle', df, colors['cycle'])
+                                with span('plotly_chart', country=selected_country, indicator=indicator, view='cycle'):
+                                    st.plotly_chart(fig_cycle, use_container_width=True)
+                        except Exception as e:
+                            st.warning(f"Could not chart the trend and cycle of {indicator.replace('_', ' ').title()}: {str(e)}")
+        
+            # Derived indicators from the transform registry, computed only when picked
+            transform_key = f"transform_selector_{selected_country}"
+            derived = save_value(transform_key, st.multiselect(
+                "Derived Indicators",
+                list(TRANSFORMS),
+                default=[name for name in saved_value(transform_key, []) if name in TRANSFORMS],
+                format_func=lambda name: TRANSFORMS[name]['label'],
+                key=transform_key
+            ))
+            if derived:
+                with span('transforms', country=selected_country):
+                    result = run_transforms(data_frames, derived)
+                for output, error in result.errors.items():
+                    st.warning(f"Could not compute {output.replace('_', ' ').title()}: {error}")
+                for output in targets(derived, data_frames):
+                    if output not in result.outputs or len(result.outputs[output].dropna()) == 0:
+                        continue
+                    view = zoom_window(result.outputs[output].dropna(), zoom)
+                    fig_derived = get_figure(selected_country, output, selected_theme, 'derived', view.to_frame(), colors['actual'],
+                                             version=view.version)
+                    with span('plotly_chart', country=selected_country, indicator=output, view='derived'):
+                        st.plotly_chart(fig_derived, use_container_width=True)
+                with st.expander("Transform timings"):
+                    st.dataframe(pd.DataFrame([
+                        {'output': output,
+                         'ms': round(result.timings.get(output, 0.0) * 1000, 2),
+                         'status': 'error' if output in result.errors else 'cached' if output in result.cached else 'computed'}
+                        for output in [*result.outputs, *result.errors]
+                    ]), hide_index=True)
 
 # Econ Thoughts Tab
 with thoughts_tab:
@@ -0,0 +1,124 @@
+import hashlib
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+_EMPTY = MappingProxyType({})
+
+
+# A read-only array of dtype. Arrays that are already read-only (slices of another
+# ArraySeries, memoized HP trends) are used as they are; anything writable is copied
+# once so no caller can change it afterwards.
+def _frozen(array, dtype):
+    array = np.asarray(array, dtype=dtype)
+    if array.flags.writeable:
+        array = array.copy()
+        array.flags.writeable = False
+    return array
+
+
+# Immutable series: datetime64[ns] dates, float64 values and optional derived float64
+# arrays of the same length (e.g. HP trend and cycle). Every array is read-only, so one
+# instance can be shared by all sessions and threads; derived versions reuse the arrays
+# of the series they come from instead of copying them.
+class ArraySeries:
+    __slots__ = ('dates', 'values', 'derived', '_dense', '_version')
+
+    def __init__(self, dates, values, derived=None):
+        dates = _frozen(dates, 'datetime64[ns]')
+        values = _frozen(values, 'float64')
+        derived = {name: _frozen(array, 'float64') for name, array in (derived or {}).items()}
+        for name, array in [('values', values), *derived.items()]:
+            if len(array) != len(dates):
+                raise ValueError(f"{name} has {len(array)} points but there are {len(dates)} dates")
+        object.__setattr__(self, 'dates', dates)
+        object.__setattr__(self, 'values', values)
+        object.__setattr__(self, 'derived', MappingProxyType(derived) if derived else _EMPTY)
+        object.__setattr__(self, '_dense', None)
+        object.__setattr__(self, '_version', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArraySeries is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ArraySeries is immutable")
+
+    def __reduce__(self):
+        return ArraySeries, (self.dates, self.values, dict(self.derived))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return f"ArraySeries({len(self)} points, derived={list(self.derived)})"
+
+    # From a date/value DataFrame such as the snapshots return
+    @classmethod
+    def from_frame(cls, df, column='value'):
+        return cls(df['date'].to_numpy(dtype='datetime64[ns]'), df[column].to_numpy(dtype='float64'))
+
+    # Values or a derived array by name
+    def __getitem__(self, name):
+        if name == 'value':
+            return self.values
+        return self.derived[name]
+
+    # Same series with more derived arrays; dates and values are shared, not copied
+    def with_derived(self, **arrays):
+        return ArraySeries(self.dates, self.values, {**self.derived, **arrays})
+
+    # Series without the points whose value is NaN. Computed once per instance, and
+    # the instance itself when nothing is missing.
+    def dropna(self):
+        if self._dense is None:
+            keep = ~np.isnan(self.values)
+            if keep.all():
+                dense = self
+            else:
+                dense = ArraySeries(self.dates[keep], self.values[keep],
+                                    {name: array[keep] for name, array in self.derived.items()})
+            object.__setattr__(self, '_dense', dense)
+        return self._dense
+
+    # Points with start <= date <= end, as views of this series' arrays
+    def window(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), 'right'))
+        if lo == 0 and hi == len(self):
+            return self
+        return ArraySeries(self.dates[lo:hi], self.values[lo:hi],
+                           {name: array[lo:hi] for name, array in self.derived.items()})
+
+    # Content hash of the dates, values and derived arrays
+    @property
+    def version(self):
+        if self._version is None:
+            digest = hashlib.sha256(self.dates.view('int64').tobytes())
+            digest.update(self.values.tobytes())
+            for name, array in sorted(self.derived.items()):
+                digest.update(name.encode('utf-8'))
+                digest.update(array.tobytes())
+            object.__setattr__(self, '_version', digest.hexdigest()[:16])
+        return self._version
+
+    # The arrays as {name: array}, for storing the series without pickle
+    def to_arrays(self):
+        return {'dates': self.dates, 'values': self.values, **{f'derived.{name}': array for name, array in self.derived.items()}}
+
+    # Series from to_arrays' output
+    @classmethod
+    def from_arrays(cls, arrays):
+        derived = {name[len('derived.'):]: array for name, array in arrays.items() if name.startswith('derived.')}
+        return cls(arrays['dates'], arrays['values'], derived)
+
+    # date/value/<derived> DataFrame backed by this series' arrays (no copy)
+    def to_frame(self):
+        return pd.DataFrame({'date': self.dates, 'value': self.values, **self.derived}, copy=False)
+
+    # Arrow table over the same buffers; NaN stays a float NaN rather than becoming null
+    def to_arrow(self):
+        columns = {'date': pa.array(self.dates), 'value': pa.array(self.values)}
+        columns.update({name: pa.array(array) for name, array in self.derived.items()})
+        return pa.table(columns)
@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+from statsmodels.tsa.filters.hp_filter import hpfilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decomposition import HP_LAMBDA, hp_filter_batch  # noqa: E402
+from run_benchmarks import make_series, measure  # noqa: E402
+
+
+# Best-of-N wall time of fn() in seconds
+def best_time(fn, repeat):
+    return min(measure(fn, repeat))
+
+
+def run(counts, repeat, lamb=HP_LAMBDA):
+    for count in counts:
+        series = make_series(count)
+        batch = hp_filter_batch(series, lamb)
+        worst = max(
+            float(np.abs(hpfilter(values, lamb=lamb)[1] - batch[name][1]).max())
+            for name, values in series.items()
+        )
+        loop_time = best_time(lambda: [hpfilter(values, lamb=lamb) for values in series.values()], repeat)
+        batch_time = best_time(lambda: hp_filter_batch(series, lamb), repeat)
+        print(f"{count:>5} series  loop {loop_time * 1000:9.2f} ms  batch {batch_time * 1000:9.2f} ms  "
+              f"speedup {loop_time / batch_time:6.1f}x  max trend diff {worst:.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare hp_filter_batch with a per-series hpfilter loop")
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.counts, args.repeat)
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np  # noqa: E402
+import streamlit  # noqa: E402,F401  (sets up streamlit before its protos are imported)
+try:
+    import websockets  # noqa: E402
+except ImportError:
+    raise ImportError("The load test needs the 'websockets' package. "
+                      "Please install it using 'pip install -r benchmarks/requirements.txt'.")
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+
+from registry import COUNTRIES  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+# Percentiles reported for every action
+PERCENTILES = (50, 95, 99)
+
+# Seconds to wait for the Streamlit server to come up
+STARTUP_TIMEOUT = 60
+
+
+# One simulated browser tab on the dashboard's websocket. Keeps the widget states a
+# browser would send back and times every script run from the rerun request to the
+# server's script_finished message.
+class DashboardSession:
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.websocket = None
+        self.widgets = {}
+        self.states = {}
+        self.timings = []
+
+    async def connect(self):
+        self.websocket = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+
+    async def close(self):
+        await self.websocket.close()
+
+    # Set a widget, by its key, to a value of the given WidgetState field
+    def set(self, key, field, value):
+        state = self.states.setdefault(key, BackMsg().rerun_script.widget_states.widgets.add())
+        state.id = self.widgets[key][0]
+        if field.endswith('array_value'):
+            getattr(state, field).data[:] = value
+        else:
+            setattr(state, field, value)
+
+    # Options of a keyed selectbox, radio or multiselect from the last run
+    def options(self, key):
+        return list(self.widgets[key][1].options)
+
+    # Rerun the script with the current widget states; records (action, seconds, bytes, exceptions)
+    async def rerun(self, action):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        received = exceptions = 0
+        start = time.perf_counter()
+        await self.websocket.send(msg.SerializeToString())
+        while True:
+            data = await asyncio.wait_for(self.websocket.recv(), self.timeout)
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta':
+                exceptions += self._track(forward.delta)
+            elif kind == 'script_finished':
+                break
+        self.timings.append((action, time.perf_counter() - start, received, exceptions))
+
+    # Remember keyed widgets as they are drawn; returns 1 for an exception element
+    def _track(self, delta):
+        kind = delta.WhichOneof('type')
+        if kind == 'new_element':
+            element_type = delta.new_element.WhichOneof('type')
+            if element_type == 'exception':
+                return 1
+            element = getattr(delta.new_element, element_type)
+            widget_id = getattr(element, 'id', '')
+        elif kind == 'add_block':
+            block_type = delta.add_block.WhichOneof('type')
+            element = getattr(delta.add_block, block_type) if block_type else None
+            widget_id = getattr(element, 'id', '') if element is not None else ''
+        else:
+            return 0
+        # Widgets with a user key have ids of the form $$ID-<hash>-<key>
+        if widget_id.startswith('$$ID-'):
+            self.widgets[widget_id.split('-', 2)[2]] = (widget_id, element)
+        return 0
+
+
+# Landing page, the Our Data tab, then `steps` random country or theme switches
+async def run_session(url, steps, all_indicators, rng, timeout, start):
+    session = DashboardSession(url, timeout)
+    await start.wait()
+    await session.connect()
+    try:
+        await session.rerun('landing')
+        session.set('section_tabs', 'string_value', 'Our Data')
+        await session.rerun('open_data_tab')
+        country = session.widgets['country_selector'][1].options[session.widgets['country_selector'][1].default]
+        theme = 'Light'
+        for _ in range(steps):
+            if rng.random() < 0.5:
+                country = rng.choice([name for name in sorted(COUNTRIES) if name != country])
+                session.set('country_selector', 'string_value', country)
+                await session.rerun('country')
+                key = f'indicator_selector_{country}'
+                if all_indicators and key in session.widgets:
+                    session.set(key, 'string_array_value', session.options(key))
+                    await session.rerun('indicators')
+            else:
+                theme = 'Dark' if theme == 'Light' else 'Light'
+                session.set('theme_selector', 'string_value', theme)
+                await session.rerun('theme')
+    finally:
+        await session.close()
+    return session.timings
+
+
+async def run_sessions(url, sessions, steps, all_indicators, seed, timeout):
+    start = asyncio.Event()
+    tasks = [
+        asyncio.create_task(run_session(url, steps, all_indicators, random.Random(seed + i), timeout, start))
+        for i in range(sessions)
+    ]
+    began = time.perf_counter()
+    start.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - began
+    timings = [timing for result in results if not isinstance(result, BaseException) for timing in result]
+    failures = [f"{type(result).__name__}: {result}" for result in results if isinstance(result, BaseException)]
+    return timings, failures, wall
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Start `streamlit run app.py` in work_dir and wait until it answers its health check
+def start_streamlit(work_dir, port, env):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1', '--browser.gatherUsageStats', 'false'],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Streamlit did not start within {STARTUP_TIMEOUT} s")
+
+
+# Wait until the stub has seen no new requests for `quiet` seconds, so background
+# refreshes started by the sessions are counted
+def settle(server, quiet=1.0, timeout=60):
+    deadline = time.monotonic() + timeout
+    last = None
+    while time.monotonic() < deadline:
+        stats = server.stats()
+        if stats == last:
+            return
+        last = stats
+        time.sleep(quiet)
+
+
+# p50/p95/p99 and counts of a list of seconds, in milliseconds
+def summarize(seconds):
+    values = np.array(seconds) * 1000
+    summary = {f'p{p}_ms': round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary.update({'max_ms': round(float(values.max()), 3), 'count': len(values)})
+    return summary
+
+
+def run(sessions, steps, all_indicators, local_first, seed, timeout, stub_options):
+    work_dir = tempfile.mkdtemp(prefix='econcentr-load-')
+    server = process = None
+    try:
+        # The app runs on a copy of the repo so refreshes never touch the real snapshots
+        for name in os.listdir(REPO_DIR):
+            path = os.path.join(REPO_DIR, name)
+            if name.endswith('.py'):
+                shutil.copy(path, work_dir)
+            elif name in ('data', 'static', '.streamlit'):
+                shutil.copytree(path, os.path.join(work_dir, name))
+        server = start_stub_server(fixture_dir=os.path.join(REPO_DIR, 'data'), seed=seed, **stub_options)
+        env = dict(
+            os.environ,
+            FRED_API_URL=server.url,
+            ECONCENTR_GSE_URL=server.gse_url,
+            ECONCENTR_CACHE_URL='memory://',
+            ECONCENTR_LOCAL_FIRST='1' if local_first else '0'
+        )
+        port = free_port()
+        process = start_streamlit(work_dir, port, env)
+        timings, failures, wall = asyncio.run(
+            run_sessions(f'ws://127.0.0.1:{port}/_stcore/stream', sessions, steps, all_indicators, seed, timeout)
+        )
+        settle(server)
+        upstream = server.stats()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    actions = {}
+    for action, seconds, _, _ in timings:
+        actions.setdefault(action, []).append(seconds)
+    return {
+        'meta': {
+            'sessions': sessions,
+            'steps': steps,
+            'all_indicators': all_indicators,
+            'local_first': local_first,
+            'seed': seed,
+            'stub': stub_options,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        },
+        'wall_seconds': round(wall, 3),
+        'page_builds': summarize([seconds for _, seconds, _, _ in timings]) if timings else None,
+        'actions': {action: summarize(seconds) for action, seconds in sorted(actions.items())},
+        'websocket_bytes': sum(received for _, _, received, _ in timings),
+        'script_exceptions': sum(1 for _, _, _, exceptions in timings if exceptions),
+        'session_failures': failures,
+        'upstream': upstream
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive concurrent dashboard sessions against a local Streamlit "
+                                                 "server backed by the offline stub")
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent simulated sessions")
+    parser.add_argument('--steps', type=int, default=6, help="Country or theme switches per session")
+    parser.add_argument('--all-indicators', action='store_true', help="Pick every indicator after each country switch")
+    parser.add_argument('--blocking', action='store_true', help="Block on FRED instead of serving local snapshots first")
+    parser.add_argument('--latency', type=float, default=0.05, help="Stub seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.05, help="Stub extra seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of stub responses that are 500s")
+    parser.add_argument('--rate-limit', type=float, help="Stub requests per second before answering 429")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help="Seconds one script run may take")
+    parser.add_argument('--output', help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.steps, args.all_indicators, not args.blocking, args.seed, args.timeout, {
+        'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate, 'rate_limit': args.rate_limit
+    })
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if report['page_builds']:
+        print(f"{args.sessions} sessions, {report['page_builds']['count']} page builds in {report['wall_seconds']} s, "
+              f"{report['websocket_bytes']} bytes received")
+        for action, summary in [('all', report['page_builds']), *report['actions'].items()]:
+            print(f"{action:<14} " + '  '.join(f"p{p} {summary[f'p{p}_ms']:>9.1f} ms" for p in PERCENTILES)
+                  + f"  ({summary['count']} runs)")
+    print(f"script exceptions: {report['script_exceptions']}")
+    for failure in report['session_failures']:
+        print(f"session failed: {failure}")
+    print(f"upstream requests: {json.dumps(report['upstream'])}")
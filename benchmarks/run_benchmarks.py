@@ -0,0 +1,384 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmarks run offline against the stub server, without rate limiting, on an in-memory cache
+os.environ.setdefault('FRED_RATE_LIMIT', '100000')
+os.environ.setdefault('FRED_BURST', '100000')
+os.environ.setdefault('ECONCENTR_CACHE_URL', 'memory://')
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly.io as pio  # noqa: E402
+
+import charts  # noqa: E402
+import columnar_store  # noqa: E402
+import decomposition  # noqa: E402
+import fred_client  # noqa: E402
+import fred_parser  # noqa: E402
+import gse  # noqa: E402
+import persistence  # noqa: E402
+import shared_cache  # noqa: E402
+import transforms  # noqa: E402
+from array_series import ArraySeries  # noqa: E402
+from registry import COUNTRIES, ECONOMIC_INDICATORS  # noqa: E402
+from snapshots import load_country_snapshots, read_snapshot, snapshot_path, sync_country  # noqa: E402
+from stub_server import start_stub_server  # noqa: E402
+
+
+# Wall times in seconds of fn() over `repeat` runs, calling setup() untimed before each
+def measure(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times):
+    return {
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'min_ms': round(min(times) * 1000, 3),
+        'max_ms': round(max(times) * 1000, 3),
+        'runs': len(times)
+    }
+
+
+# Drop every in-process and shared cache so the next run starts cold
+def clear_caches():
+    persistence.flush()
+    shared_cache.set_cache(shared_cache.MemoryCache())
+    decomposition._memo.clear()
+    charts._figure_cache.clear()
+    transforms._memo.clear()
+    fred_client._session = None
+
+
+# The figure JSON st.plotly_chart sends for a figure, serialized the way it does it
+def chart_payload(fig):
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+# Everything the Our Data tab does for one country, minus sending charts to the browser.
+# layout is 'charts' (one figure per view) or 'grid' (one dashboard figure).
+# Returns the number of bytes of figure JSON the page would send.
+def build_page(country, theme='Light', layout='charts'):
+    indicators = ECONOMIC_INDICATORS[country]
+    data_frames = {name: df.dropna(subset=['value']) for name, df in load_country_snapshots(country, indicators).items()}
+    decomposed = decomposition.hp_filter_memoized(
+        {name: df['value'] for name, df in data_frames.items() if len(df) > 4}
+    )
+    colors = charts.CHART_COLORS[country][theme.lower()]
+    if layout == 'grid':
+        panels = {
+            name: df.assign(trend=decomposed[name][1], cycle=decomposed[name][0]) if name in decomposed else df
+            for name, df in data_frames.items() if len(df)
+        }
+        return len(chart_payload(charts.get_dashboard(country, theme, panels, colors)))
+    payload = 0
+    for name, df in data_frames.items():
+        if len(df) == 0:
+            continue
+        payload += len(chart_payload(charts.get_figure(country, name, theme, 'actual', df, colors['actual'])))
+        if name in decomposed:
+            cycle, trend = decomposed[name]
+            df = df.assign(trend=trend, cycle=cycle)
+            for view in ('trend', 'cycle'):
+                payload += len(chart_payload(charts.get_figure(country, name, theme, view, df, colors[view])))
+    return payload
+
+
+def bench_fetch(results, repeat):
+    for country in COUNTRIES:
+        indicators = ECONOMIC_INDICATORS[country]
+
+        def remove_snapshots():
+            clear_caches()
+            for name in indicators:
+                path = snapshot_path(country, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+        results[f'fetch/{country}/cold'] = summarize(measure(lambda: sync_country(country, indicators), repeat, remove_snapshots))
+        results[f'fetch/{country}/incremental'] = summarize(measure(lambda: sync_country(country, indicators), repeat, clear_caches))
+        sync_country(country, indicators)
+        results[f'fetch/{country}/warm'] = summarize(measure(lambda: sync_country(country, indicators), repeat))
+
+
+def bench_parse(results, repeat, data_dir):
+    paths = []
+    for name in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, name)
+        if name.endswith('.csv') and pd.read_csv(path, nrows=0).columns.tolist() == ['date', 'value']:
+            paths.append(path)
+    results['parse/csv_all'] = summarize(measure(lambda: [read_snapshot(path) for path in paths], repeat))
+    columnar_store.migrate_csvs(data_dir)
+    results['parse/store_all'] = summarize(measure(lambda: columnar_store.read_series(), repeat))
+    results['parse/store_one_country'] = summarize(measure(lambda: columnar_store.read_series(countries=['Kenya']), repeat))
+    bench_fred_parse(results, repeat)
+
+
+# FRED observations response for a daily series of n points, with every 10th value missing
+def fred_response(n):
+    dates = pd.date_range('1950-01-01', periods=n, freq='D').strftime('%Y-%m-%d')
+    values = np.random.default_rng(0).normal(100, 10, n).round(4).astype(str)
+    values[::10] = '.'
+    observations = [
+        {'realtime_start': '2025-01-01', 'realtime_end': '2025-01-01', 'date': date, 'value': value}
+        for date, value in zip(dates, values)
+    ]
+    return json.dumps({'count': n, 'offset': 0, 'limit': 100000, 'observations': observations}).encode('utf-8')
+
+
+# The parse path fred_client used before streaming: whole-body JSON, then DataFrame conversions
+def parse_fred_json(body):
+    df = pd.DataFrame(json.loads(body).get('observations', []))[['date', 'value']]
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def parse_fred_stream(body):
+    chunks = (body[i:i + fred_parser.CHUNK_SIZE] for i in range(0, len(body), fred_parser.CHUNK_SIZE))
+    dates, values = fred_parser.parse_observations(chunks)
+    return pd.DataFrame({'date': dates, 'value': values}, copy=False)
+
+
+# Peak bytes Python allocates while running fn
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_fred_parse(results, repeat, lengths=(1000, 25000)):
+    for n in lengths:
+        body = fred_response(n)
+        for name, parse in (('json', parse_fred_json), ('stream', parse_fred_stream)):
+            results[f'parse/fred_{name}/{n}'] = summarize(measure(lambda: parse(body), repeat))
+            results[f'parse/fred_{name}/{n}']['peak_bytes'] = peak_memory(lambda: parse(body))
+
+
+# Random-walk series with a mix of lengths, like the annual FRED indicators
+def make_series(count, lengths=(27, 34, 61, 65), seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        f'series_{i}': pd.Series(rng.normal(size=lengths[i % len(lengths)]).cumsum(), name='value')
+        for i in range(count)
+    }
+
+
+def bench_hp(results, repeat, counts):
+    for count in counts:
+        series = make_series(count)
+        results[f'hp/batch/{count}'] = summarize(measure(lambda: decomposition.hp_filter_batch(series), repeat))
+        decomposition.hp_filter_memoized(series)
+        results[f'hp/memoized_warm/{count}'] = summarize(measure(lambda: decomposition.hp_filter_memoized(series), repeat))
+        try:
+            from statsmodels.tsa.filters.hp_filter import hpfilter
+        except ImportError:
+            continue
+        results[f'hp/statsmodels_loop/{count}'] = summarize(
+            measure(lambda: [hpfilter(values, lamb=decomposition.HP_LAMBDA) for values in series.values()], repeat)
+        )
+
+
+# Every registered transform over one country, in process and on the worker pool. The
+# pool is started before timing so the runs measure work, not process start-up.
+def bench_transforms(results, repeat, country='Ghana'):
+    indicators = ECONOMIC_INDICATORS[country]
+    series = {name: ArraySeries.from_frame(df) for name, df in load_country_snapshots(country, indicators).items()}
+    requested = list(transforms.TRANSFORMS)
+    transforms.run_transforms(series, requested)
+    for label, workers in (('inline', 0), ('pool', transforms.TRANSFORM_WORKERS)):
+        errors = []
+        results[f'transform/{country}/{label}/cold'] = summarize(measure(
+            lambda: errors.append(transforms.run_transforms(series, requested, workers=workers).errors), repeat, clear_caches
+        ))
+        results[f'transform/{country}/{label}/cold']['errors'] = len(errors[-1])
+    results[f'transform/{country}/warm'] = summarize(measure(lambda: transforms.run_transforms(series, requested), repeat))
+
+
+# GSE ingest against the stub's replayed AFX feed: into empty histories, then one
+# more trading day appended to existing ones
+def bench_gse(results, repeat, server):
+    def remove_history():
+        shutil.rmtree(gse.GSE_HISTORY_DIR, ignore_errors=True)
+        server.gse_day = 0
+
+    results['gse/ingest/cold'] = summarize(measure(lambda: gse.ingest_gse(server.gse_url), repeat, remove_history))
+    results['gse/ingest/append'] = summarize(measure(lambda: gse.ingest_gse(server.gse_url), repeat))
+
+
+def bench_figures(results, repeat):
+    df = read_snapshot(snapshot_path('Kenya', 'gdp'))
+    for theme in ('Light', 'Dark'):
+        results[f'figure/build/{theme}'] = summarize(
+            measure(lambda: charts.build_figure(df, 'gdp', 'actual', theme, '#1a73e8'), repeat)
+        )
+    fig = charts.build_figure(df, 'gdp', 'actual', 'Light', '#1a73e8')
+    results['figure/to_json'] = summarize(measure(lambda: chart_payload(fig), repeat))
+
+
+# Per-chart pages and dashboard grid pages. payload_bytes is the figure JSON sent over
+# the websocket; browser render time is not measured here.
+def bench_pages(results, repeat):
+    for country in COUNTRIES:
+        for layout, suffix in (('charts', ''), ('grid', '/grid')):
+            payloads = []
+            results[f'page/{country}{suffix}/cold'] = summarize(
+                measure(lambda: payloads.append(build_page(country, layout=layout)), repeat, clear_caches)
+            )
+            results[f'page/{country}{suffix}/cold']['payload_bytes'] = payloads[-1]
+            results[f'page/{country}{suffix}/warm'] = summarize(measure(lambda: build_page(country, layout=layout), repeat))
+
+
+# Runs in a fresh interpreter: first render of the landing tab, then the first opening of
+# the Our Data tab. Streamlit itself is imported before timing starts.
+STARTUP_SCRIPT = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+start = time.perf_counter()
+at.run()
+landing = time.perf_counter() - start
+at.session_state['section_tabs'] = 'Our Data'
+start = time.perf_counter()
+at.run()
+print(landing, time.perf_counter() - start)
+"""
+
+
+# Cold start of the app, one new process per run
+def bench_startup(results, repeat, fred_url):
+    env = dict(os.environ, FRED_API_URL=fred_url)
+    landing, data_tab = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, os.path.join(REPO_DIR, 'app.py')],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        times = [float(value) for value in output.split()[-2:]]
+        landing.append(times[0])
+        data_tab.append(times[1])
+    results['startup/landing'] = summarize(landing)
+    results['startup/first_data_tab'] = summarize(data_tab)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Compare medians with a baseline report; returns the names that got slower than tolerance allows
+def compare(report, baseline, tolerance):
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if not base or not base['median_ms']:
+            continue
+        ratio = result['median_ms'] / base['median_ms']
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{name:<40} {base['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms  {ratio:5.2f}x  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def run(repeat, hp_counts, stages):
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='econcentr-bench-')
+    cwd = os.getcwd()
+    try:
+        # Work on a copy of data/ so fetch benchmarks never touch the real snapshots
+        shutil.copytree(os.path.join(REPO_DIR, 'data'), os.path.join(work_dir, 'data'))
+        os.chdir(work_dir)
+        server = start_stub_server(fixture_dir=os.path.join(REPO_DIR, 'data'))
+        fred_client.FRED_API_URL = server.url
+        try:
+            if 'fetch' in stages:
+                bench_fetch(results, repeat)
+            if 'parse' in stages:
+                bench_parse(results, repeat, 'data')
+            if 'hp' in stages:
+                bench_hp(results, repeat, hp_counts)
+            if 'gse' in stages:
+                bench_gse(results, repeat, server)
+            if 'transform' in stages:
+                bench_transforms(results, repeat)
+            if 'figure' in stages:
+                bench_figures(results, repeat)
+            if 'page' in stages:
+                bench_pages(results, repeat)
+            if 'startup' in stages:
+                bench_startup(results, repeat, server.url)
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+STAGES = ('fetch', 'parse', 'gse', 'hp', 'transform', 'figure', 'page', 'startup')
+
+# Committed reference report that --compare checks against by default
+BASELINE_PATH = os.path.join(REPO_DIR, 'benchmarks', 'baseline.json')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ingest, transform and render stages")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--hp-counts', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'benchmarks', 'report.json'),
+                        help="Where to write the JSON report")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, metavar='BASELINE',
+                        help="Compare medians with a baseline report (default: benchmarks/baseline.json) "
+                             "and exit non-zero on a regression")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown of a median before it counts as a regression")
+    args = parser.parse_args()
+
+    report = run(args.repeat, args.hp_counts, args.stages)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    for name, result in report['results'].items():
+        print(f"{name:<40} median {result['median_ms']:>10.3f} ms  min {result['min_ms']:>10.3f} ms")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} (commit {baseline['meta'].get('commit')}, {baseline['meta'].get('platform')})")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
@@ -0,0 +1,219 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from downsample import POINT_BUDGET, downsample_frame
+from metrics import cache_result, span
+from versions import frame_version
+
+# Number of built figures kept in the figure cache
+FIGURE_CACHE_SIZE = 512
+
+# How each chart view is drawn: plotted column, axis label and title suffix
+VIEWS = {
+    'actual': {'column': 'value', 'label': 'Value', 'title': 'Actual Data'},
+    'trend': {'column': 'trend', 'label': 'Trend Value', 'title': 'Trend'},
+    'cycle': {'column': 'cycle', 'label': 'Cyclical Value', 'title': 'Cyclical'},
+    'derived': {'column': 'value', 'label': 'Value', 'title': ''}
+}
+
+# Dictionary of chart colors per country
+CHART_COLORS = {
+    'Ghana': {
+        'light': {'actual': '#28a745', 'trend': '#28a745', 'cycle': '#218838'},
+        'dark': {'actual': '#20c997', 'trend': '#20c997', 'cycle': '#17a2b8'}
+    },
+    'Nigeria': {
+        'light': {'actual': '#1a73e8', 'trend': '#1a73e8', 'cycle': '#6610f2'},
+        'dark': {'actual': '#00ffcc', 'trend': '#00ffcc', 'cycle': '#ffeb3b'}
+    },
+    'Kenya': {
+        'light': {'actual': '#6610f2', 'trend': '#6610f2', 'cycle': '#6f42c1'},
+        'dark': {'actual': '#ffeb3b', 'trend': '#ffeb3b', 'cycle': '#ffd700'}
+    }
+}
+
+# Height in pixels of one indicator row in the dashboard grid
+DASHBOARD_ROW_HEIGHT = 320
+
+# Views drawn side by side in each row of the dashboard grid
+DASHBOARD_VIEWS = ('actual', 'trend', 'cycle')
+
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+# Common Plotly layout settings with watermark, built once per theme
+@lru_cache(maxsize=None)
+def chart_layout(theme):
+    return dict(
+        title={
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': {
+                'size': 28,
+                'family': 'EB Garamond, Garamond, serif',
+                'color': '#1a1a1a' if theme == "Light" else '#e6e6e6',
+                'weight': 'bold'
+            }
+        },
+        width=1100,
+        height=700,
+        margin=dict(l=80, r=80, t=120, b=80),
+        plot_bgcolor='#ffffff' if theme == "Light" else '#2a2a2a',
+        paper_bgcolor='#ffffff' if theme == "Light" else '#2a2a2a',
+        font=dict(
+            family='EB Garamond, Garamond, serif',
+            color='#1a1a1a' if theme == "Light" else '#e6e6e6',
+            size=18
+        ),
+        xaxis=dict(
+            tickfont=dict(
+                family='EB Garamond, Garamond, serif',
+                color='#1a1a1a' if theme == "Light" else '#e6e6e6',
+                size=16
+            ),
+            gridcolor='#d3d3d3' if theme == "Light" else '#555555',
+            zerolinecolor='#d3d3d3' if theme == "Light" else '#555555'
+        ),
+        yaxis=dict(
+            tickfont=dict(
+                family='EB Garamond, Garamond, serif',
+                color='#1a1a1a' if theme == "Light" else '#e6e6e6',
+                size=16
+            ),
+            gridcolor='rgba(0,0,0,0)',  # Remove horizontal grid lines
+            zerolinecolor='#d3d3d3' if theme == "Light" else '#555555'
+        ),
+        annotations=[
+            dict(
+                text="EconCentr by Osman John Froko",
+                x=0.98,
+                y=0.02,
+                xref="paper",
+                yref="paper",
+                showarrow=False,
+                font=dict(
+                    family='EB Garamond, Garamond, serif',
+                    size=10,
+                    color='#999999' if theme == "Light" else '#666666'
+                ),
+                opacity=0.3
+            )
+        ]
+    )
+
+
+# Apply the common layout to a figure
+def apply_chart_layout(fig, title, theme):
+    fig.update_layout(chart_layout(theme), title_text=title)
+    return fig
+
+
+# Build one styled area chart for an indicator view
+def build_figure(df, indicator, view, theme, color):
+    spec = VIEWS[view]
+    fig = px.area(df, x='date', y=spec['column'],
+                  labels={spec['column']: spec['label'], 'date': 'Date'})
+    fig.update_traces(fill='tozeroy', line_color=color)
+    return apply_chart_layout(fig, f"{indicator.replace('_', ' ').title()} {spec['title']}".strip(), theme)
+
+
+# Short content hash of the dates and plotted column of a frame
+def data_version(df, column='value'):
+    return frame_version(df, column)
+
+
+# Every indicator of a country in one figure: a row per indicator with its actual,
+# trend and cycle views side by side. All panels share one layout, one set of axis
+# styles and one watermark, so the page sends a single payload instead of one fully
+# styled figure per chart. panels maps indicator names to date/value frames, with
+# trend and cycle columns when the series was decomposed.
+def build_dashboard(country, panels, theme, colors, max_points=POINT_BUDGET):
+    layout = chart_layout(theme)
+    titles = [
+        f"{indicator.replace('_', ' ').title()} {VIEWS[view]['title']}" if view == 'actual' or view in df else ''
+        for indicator, df in panels.items()
+        for view in DASHBOARD_VIEWS
+    ]
+    fig = make_subplots(rows=len(panels), cols=len(DASHBOARD_VIEWS), subplot_titles=titles,
+                        horizontal_spacing=0.06, vertical_spacing=min(0.3 / len(panels), 0.08))
+    for row, (indicator, df) in enumerate(panels.items(), start=1):
+        for col, view in enumerate(DASHBOARD_VIEWS, start=1):
+            spec = VIEWS[view]
+            if spec['column'] not in df:
+                continue
+            points = downsample_frame(df, spec['column'], max_points)
+            fig.add_trace(
+                go.Scatter(x=points['date'], y=points[spec['column']], mode='lines', fill='tozeroy',
+                           line_color=colors[view], name=f"{indicator} {view}", showlegend=False),
+                row=row, col=col
+            )
+    height = DASHBOARD_ROW_HEIGHT * len(panels) + 200
+    fig.update_layout(
+        title={**layout['title'], 'text': f"{country} Economic Indicators", 'y': 1 - 40 / height},
+        height=height,
+        margin=dict(l=60, r=40, t=140, b=60),
+        plot_bgcolor=layout['plot_bgcolor'],
+        paper_bgcolor=layout['paper_bgcolor'],
+        font=layout['font']
+    )
+    fig.update_annotations(font_size=16)
+    fig.update_xaxes(**layout['xaxis'])
+    fig.update_yaxes(**layout['yaxis'])
+    fig.add_annotation(layout['annotations'][0])
+    return fig
+
+
+# Figure cached under key; build() makes the figure on a miss. The cached go.Figure is
+# shared by every session and must not be modified: st.plotly_chart only reads it
+# (to_dict), which is far cheaper than rebuilding a validated figure from JSON or from a
+# dict, as Streamlit does for dicts, on every hit.
+def _cached_figure(key, build, **labels):
+    with _figure_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+    cache_result('figure', fig is not None)
+    if fig is not None:
+        return fig
+    with span('figure_build', **labels):
+        fig = build()
+    with _figure_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+
+# Figure for (country, indicator, theme, view), served from the figure cache.
+# A new data version builds and caches a fresh figure. Frames longer than
+# max_points are thinned with LTTB before plotting.
+def get_figure(country, indicator, theme, view, df, color, version=None, max_points=POINT_BUDGET):
+    version = version or data_version(df, VIEWS[view]['column'])
+    return _cached_figure(
+        (country, indicator, theme, view, version, max_points),
+        lambda: build_figure(downsample_frame(df, VIEWS[view]['column'], max_points), indicator, view, theme, color),
+        country=country, indicator=indicator, view=view
+    )
+
+
+# Dashboard grid for a country, cached like single charts. versions optionally maps
+# indicators to a content version covering all of their panel's columns.
+def get_dashboard(country, theme, panels, colors, versions=None, max_points=POINT_BUDGET):
+    versions = versions or {}
+    key = (country, 'dashboard', theme, max_points, tuple(
+        (indicator, versions.get(indicator) or tuple(data_version(df, VIEWS[view]['column']) for view in DASHBOARD_VIEWS if VIEWS[view]['column'] in df))
+        for indicator, df in panels.items()
+    ))
+    return _cached_figure(
+        key,
+        lambda: build_dashboard(country, panels, theme, colors, max_points),
+        country=country, indicator='*', view='dashboard'
+    )
@@ -0,0 +1,168 @@
+import glob
+import os
+import re
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from persistence import atomic_write, file_lock, write_behind
+
+# Single columnar store for every (country, indicator, date) observation
+STORE_PATH = os.path.join('data', 'series.parquet')
+
+# Typed schema of the store; rows are sorted by country, indicator and date
+SCHEMA = pa.schema([
+    ('country', pa.dictionary(pa.int16(), pa.string())),
+    ('indicator', pa.dictionary(pa.int16(), pa.string())),
+    ('date', pa.timestamp('ms')),
+    ('value', pa.float64())
+])
+
+# ISO codes used in the legacy <indicator>_<ISO>.csv file names
+ISO_COUNTRIES = {
+    'GHA': 'Ghana',
+    'NGA': 'Nigeria',
+    'KEN': 'Kenya',
+    'ARG': 'Argentina',
+    'BRA': 'Brazil'
+}
+
+# Legacy files without a country suffix were written by fetch_data.py for Ghana
+DEFAULT_COUNTRY = 'Ghana'
+
+# Upserts waiting for the write-behind worker: {path: {(country, indicator): df}}
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+# Build a typed Arrow table from a long (country, indicator, date, value) frame
+def _to_table(df):
+    df = df[['country', 'indicator', 'date', 'value']].sort_values(['country', 'indicator', 'date'])
+    df = df.astype({'country': str, 'indicator': str})
+    df['date'] = pd.to_datetime(df['date']).astype('datetime64[ms]')
+    df['value'] = pd.to_numeric(df['value'], errors='coerce').astype('float64')
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+# Parquet bytes of a typed table, one row group per country so country filters skip whole groups
+def _to_parquet(table):
+    sink = pa.BufferOutputStream()
+    with pq.ParquetWriter(sink, SCHEMA) as writer:
+        countries = table.column('country').to_pylist()
+        start = 0
+        for end in range(1, len(countries) + 1):
+            if end == len(countries) or countries[end] != countries[start]:
+                writer.write_table(table.slice(start, end - start))
+                start = end
+    return sink.getvalue().to_pybytes()
+
+
+# Write the store atomically
+def write_store(df, path=STORE_PATH):
+    table = _to_table(df)
+    with file_lock(path):
+        atomic_write(path, _to_parquet(table))
+    return table.num_rows
+
+
+# Query the store. Filters are pushed down to the Parquet reader, so only the
+# matching row groups and requested columns are decoded from the memory-mapped file.
+def read_series(countries=None, indicators=None, start=None, end=None, columns=None, path=STORE_PATH):
+    filters = []
+    if countries is not None:
+        filters.append(('country', 'in', list(countries)))
+    if indicators is not None:
+        filters.append(('indicator', 'in', list(indicators)))
+    if start is not None:
+        filters.append(('date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('date', '<=', pd.Timestamp(end)))
+    table = pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+    df = table.to_pandas()
+    for column in ('country', 'indicator'):
+        if column in df:
+            df[column] = df[column].astype(str)
+    return df
+
+
+# The stored observations with those of the given {(country, indicator): df} replaced
+def _upserted(updates, path):
+    frames = [
+        df[['date', 'value']].assign(country=country, indicator=indicator)
+        for (country, indicator), df in updates.items()
+    ]
+    if os.path.exists(path):
+        existing = read_series(path=path)
+        replaced = pd.MultiIndex.from_frame(existing[['country', 'indicator']]).isin(list(updates))
+        frames.insert(0, existing[~replaced])
+    return _to_table(pd.concat(frames, ignore_index=True))
+
+
+# Replace the stored observations of some of a country's indicators. The read-modify-write
+# holds a lock shared with every other process, so concurrent upserts never drop each other's rows.
+def upsert_series(country, data_frames, path=STORE_PATH):
+    if not data_frames:
+        return 0
+    with file_lock(path):
+        table = _upserted({(country, indicator): df for indicator, df in data_frames.items()}, path)
+        atomic_write(path, _to_parquet(table))
+    return table.num_rows
+
+
+# upsert_series off the calling thread, through the write-behind queue. Upserts queued
+# before the worker gets to the store are applied in one read-modify-write.
+def upsert_behind(country, data_frames, path=STORE_PATH):
+    if not data_frames:
+        return
+    with _pending_lock:
+        updates = _pending.setdefault(path, {})
+        for indicator, df in data_frames.items():
+            updates[(country, indicator)] = df
+    write_behind(path, path, _serialize_pending, lock=True)
+
+
+# Runs on the write-behind worker under the store's file lock
+def _serialize_pending(path):
+    with _pending_lock:
+        updates = _pending.pop(path, {})
+    if not updates and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    return _to_parquet(_upserted(updates, path))
+
+
+# Work out (country, indicator) from a legacy CSV name and its precedence.
+# <indicator>_<Country>.csv beats <indicator>_<ISO>.csv, which beats <indicator>.csv.
+def _parse_csv_name(file_name, countries):
+    stem = os.path.splitext(file_name)[0]
+    match = re.match(r'^(.+)_([A-Za-z]+)$', stem)
+    if match and match.group(2) in countries:
+        return match.group(2), match.group(1), 0
+    if match and match.group(2) in ISO_COUNTRIES:
+        return ISO_COUNTRIES[match.group(2)], match.group(1), 1
+    return DEFAULT_COUNTRY, stem, 2
+
+
+# One-shot migration of the date/value CSVs in data/ into the columnar store
+def migrate_csvs(data_dir='data', path=STORE_PATH):
+    countries = set(ISO_COUNTRIES.values())
+    frames = []
+    for csv_path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        df = pd.read_csv(csv_path)
+        if list(df.columns) != ['date', 'value']:
+            continue
+        country, indicator, precedence = _parse_csv_name(os.path.basename(csv_path), countries)
+        frames.append(df.assign(country=country, indicator=indicator, precedence=precedence))
+    if not frames:
+        return 0
+    df = pd.concat(frames, ignore_index=True)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values('precedence', kind='stable').drop_duplicates(['country', 'indicator', 'date'])
+    return write_store(df, path)
+
+
+if __name__ == "__main__":
+    rows = migrate_csvs()
+    print(f"Migrated {rows} observations into {STORE_PATH}")
@@ -0,0 +1,217 @@
+import argparse
+import gzip
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Route
+
+from decomposition import HP_LAMBDA, hp_filter_memoized
+from metrics import span
+from queries import compare, load_long
+from registry import ECONOMIC_INDICATORS
+from shared_cache import content_version
+from versions import changed_since, generation
+
+# Address of the data API; it runs as its own process next to the Streamlit app
+API_HOST = os.environ.get('ECONCENTR_API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('ECONCENTR_API_PORT', '8502'))
+
+# Responses smaller than this many bytes are not worth compressing
+GZIP_MIN_SIZE = 500
+
+# Clients may reuse a response for this long before revalidating with If-None-Match
+MAX_AGE = 300
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Optional date query parameter as a Timestamp
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise ApiError(400, f"Invalid {name} date: {value}")
+
+
+def _list_param(request, name):
+    value = request.query_params.get(name)
+    return [item for item in value.split(',') if item] if value else None
+
+
+def _accepts_gzip(request):
+    return 'gzip' in request.headers.get('accept-encoding', '')
+
+
+# Serialized body with an ETag of its content; answers 304 when the client already has it.
+# Bodies of GZIP_MIN_SIZE bytes or more are gzipped here, not by middleware, so the gzip and
+# identity representations carry different ETags and every response says it varies by encoding.
+def _respond(request, body, media_type):
+    encoding = 'gzip' if len(body) >= GZIP_MIN_SIZE and _accepts_gzip(request) else None
+    version = content_version(body)
+    etag = f'"{version}-gzip"' if encoding else f'"{version}"'
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}', 'Vary': 'Accept-Encoding'}
+    if etag in [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]:
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        body = gzip.compress(body, mtime=0)
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+
+def _error(status, message):
+    return Response(json.dumps({'error': message}), status_code=status, media_type='application/json')
+
+
+# One observation per row, dates as YYYY-MM-DD and missing values as null (JSON) or empty (CSV).
+# Infinite values (a year-on-year change from zero) are missing too; JSON has no infinity.
+def _encode_frame(df, fmt, meta):
+    df = df.replace([np.inf, -np.inf], np.nan).assign(date=df['date'].dt.strftime('%Y-%m-%d'))
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8'), 'text/csv'
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return json.dumps({**meta, 'observations': records}).encode('utf-8'), 'application/json'
+
+
+def _format_param(request):
+    fmt = request.query_params.get('format', 'json')
+    if fmt not in ('json', 'csv'):
+        raise ApiError(400, "format must be json or csv")
+    return fmt
+
+
+# Series with its HP trend and cycle. The filter runs on the full history, as in the
+# dashboard, so a date range only trims the output and never changes the decomposition.
+# Raises ApiError(404) when nothing is stored for the series yet.
+def series_frame(country, indicator, start=None, end=None):
+    df = load_long([indicator], [country])[['date', 'value']].dropna(subset=['value']).reset_index(drop=True)
+    if df.empty:
+        raise ApiError(404, f"No data stored for {country}/{indicator}")
+    if len(df) > 4:
+        cycle, trend = hp_filter_memoized({indicator: df['value']}, lamb=HP_LAMBDA)[indicator]
+        df = df.assign(trend=np.asarray(trend), cycle=np.asarray(cycle))
+    else:
+        df = df.assign(trend=np.nan, cycle=np.nan)
+    if start is not None:
+        df = df[df['date'] >= start]
+    if end is not None:
+        df = df[df['date'] <= end]
+    return df
+
+
+# GET /series: every country/indicator pair the API can serve
+async def list_series(request):
+    catalog = [
+        {'country': country, 'indicator': indicator, 'series_id': series_id}
+        for country, series in ECONOMIC_INDICATORS.items()
+        for indicator, series_id in series.items()
+    ]
+    return _respond(request, json.dumps({'series': catalog}).encode('utf-8'), 'application/json')
+
+
+# GET /series/{country}/{indicator}?start=&end=&format=json|csv
+async def get_series(request):
+    country = request.path_params['country']
+    indicator = request.path_params['indicator']
+    series_id = ECONOMIC_INDICATORS.get(country, {}).get(indicator)
+    if series_id is None:
+        return _error(404, f"Unknown series {country}/{indicator}")
+    try:
+        fmt = _format_param(request)
+        start, end = _date_param(request, 'start'), _date_param(request, 'end')
+    except ApiError as e:
+        return _error(e.status, e.message)
+    with span('api_request', endpoint='series', country=country, indicator=indicator):
+        try:
+            df = await run_in_threadpool(series_frame, country, indicator, start, end)
+        except ApiError as e:
+            return _error(e.status, e.message)
+        meta = {'country': country, 'indicator': indicator, 'series_id': series_id, 'hp_lambda': HP_LAMBDA}
+        body, media_type = _encode_frame(df, fmt, meta)
+    return _respond(request, body, media_type)
+
+
+# GET /compare?indicators=&countries=&start=&end=&frequency=&how=&yoy=&rolling=&rolling_how=&format=
+# Aligned cross-country frame from queries.compare, columns named <indicator>_<Country>
+async def get_comparison(request):
+    params = request.query_params
+    try:
+        fmt = _format_param(request)
+        indicators = _list_param(request, 'indicators')
+        if not indicators:
+            raise ApiError(400, "indicators is required")
+        start, end = _date_param(request, 'start'), _date_param(request, 'end')
+        rolling = int(params['rolling']) if params.get('rolling') else None
+        if rolling is not None and rolling < 1:
+            raise ApiError(400, "rolling must be a positive integer")
+        options = {
+            'frequency': params.get('frequency') or None,
+            'how': params.get('how', 'mean'),
+            'yoy': params.get('yoy', '').lower() in ('1', 'true', 'yes'),
+            'rolling': rolling,
+            'rolling_how': params.get('rolling_how', 'mean')
+        }
+    except ApiError as e:
+        return _error(e.status, e.message)
+    except ValueError:
+        return _error(400, "rolling must be a positive integer")
+    with span('api_request', endpoint='compare'):
+        try:
+            wide = await run_in_threadpool(compare, indicators, _list_param(request, 'countries'), start, end, **options)
+        except ValueError as e:
+            return _error(400, str(e))
+        wide.columns = [f'{indicator}_{country}' for indicator, country in wide.columns]
+        meta = {'indicators': indicators, 'columns': list(wide.columns)}
+        body, media_type = _encode_frame(wide.reset_index(), fmt, meta)
+    return _respond(request, body, media_type)
+
+
+# GET /changes?since=&country=: series whose content changed after the given generation.
+# Clients keep the returned generation and pass it back as since to poll for updates.
+async def get_changes(request):
+    try:
+        since = int(request.query_params.get('since', '0'))
+    except ValueError:
+        return _error(400, "since must be an integer")
+    current = generation()
+    changed = changed_since(since, request.query_params.get('country') or None)
+    payload = {
+        'generation': current,
+        'changed': [
+            {'country': country, 'indicator': indicator, 'version': version}
+            for (country, indicator), version in sorted(changed.items())
+        ]
+    }
+    return _respond(request, json.dumps(payload).encode('utf-8'), 'application/json')
+
+
+app = Starlette(
+    routes=[
+        Route('/series', list_series),
+        Route('/series/{country}/{indicator}', get_series),
+        Route('/compare', get_comparison),
+        Route('/changes', get_changes)
+    ]
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Read-only JSON/CSV API over the local series store")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_solve_banded, cholesky_banded
+
+from metrics import cache_result, span
+from shared_cache import get_cache
+
+# Smoothing parameter used for the annual series on the dashboard
+HP_LAMBDA = 6.25
+
+# Number of memoized trends kept in memory
+MEMO_SIZE = 512
+
+# Seconds a trend stays in the shared cache; entries are content-addressed, so this only
+# bounds how long trends of series nobody views any more are kept
+HP_CACHE_TTL = int(os.environ.get('ECONCENTR_HP_CACHE_TTL', str(7 * 24 * 3600)))
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+# Banded Cholesky factor of I + lamb * K'K, where K is the (n-2) x n second-difference
+# matrix of the Hodrick-Prescott filter. Cached so equal-length series share one factorization.
+@lru_cache(maxsize=64)
+def _hp_factor(n, lamb):
+    d0 = np.zeros(n)
+    d0[:n - 2] += 1
+    d0[1:n - 1] += 4
+    d0[2:] += 1
+    d1 = np.zeros(n - 1)
+    d1[:n - 2] -= 2
+    d1[1:n - 1] -= 2
+    d2 = np.ones(n - 2)
+    ab = np.zeros((3, n))
+    ab[0, 2:] = lamb * d2
+    ab[1, 1:] = lamb * d1
+    ab[2, :] = 1 + lamb * d0
+    return cholesky_banded(ab, lower=False)
+
+
+# Hodrick-Prescott trend of the columns of a 2-D (n x m) array
+def _hp_trend(values, lamb):
+    n = values.shape[0]
+    if n < 3:
+        return values.copy()
+    return cho_solve_banded((_hp_factor(n, float(lamb)), False), values)
+
+
+# Decompose many series at once with the Hodrick-Prescott filter.
+# series maps names to 1-D arrays or pandas Series without missing values. Series are
+# grouped by length and each group is solved in one call against a shared factorization.
+# Returns {name: (cycle, trend)} in the same order as statsmodels' hpfilter.
+def hp_filter_batch(series, lamb=HP_LAMBDA):
+    by_length = {}
+    for name, values in series.items():
+        by_length.setdefault(len(values), []).append(name)
+    results = {}
+    for names in by_length.values():
+        stacked = np.column_stack([np.asarray(series[name], dtype='float64') for name in names])
+        trends = _hp_trend(stacked, lamb)
+        for i, name in enumerate(names):
+            values = series[name]
+            trend = trends[:, i]
+            results[name] = _split(values, stacked[:, i], trend)
+    return {name: results[name] for name in series}
+
+
+# (cycle, trend) for one series, as pandas Series when the input was one
+def _split(values, raw, trend):
+    cycle = raw - trend
+    if isinstance(values, pd.Series):
+        base = values.name or 'value'
+        cycle = pd.Series(cycle, index=values.index, name=f'{base}_cycle')
+        trend = pd.Series(trend, index=values.index, name=f'{base}_trend')
+    return cycle, trend
+
+
+# Content address of a series and smoothing parameter
+def memo_key(values, lamb=HP_LAMBDA):
+    digest = hashlib.sha256(np.ascontiguousarray(values, dtype='float64').tobytes())
+    digest.update(np.float64(lamb).tobytes())
+    return digest.hexdigest()
+
+
+def _memo_get(key):
+    with _memo_lock:
+        trend = _memo.get(key)
+        if trend is not None:
+            _memo.move_to_end(key)
+    cache_result('hp_memory', trend is not None)
+    if trend is not None:
+        return trend
+    try:
+        entry = get_cache().get(f'hp:{key}')
+    except Exception:
+        entry = None
+    cache_result('hp_shared', entry is not None)
+    if entry is None:
+        return None
+    return _memo_put(key, entry.value, persist=False)
+
+
+def _memo_put(key, trend, persist=True):
+    trend = np.array(trend, dtype='float64')
+    trend.flags.writeable = False
+    with _memo_lock:
+        _memo[key] = trend
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    if persist:
+        try:
+            get_cache().set(f'hp:{key}', trend, HP_CACHE_TTL)
+        except Exception:
+            pass
+    return trend
+
+
+# hp_filter_batch with results memoized by a hash of the values and lambda.
+# Hits come from an in-memory LRU, then from the shared cache (so results survive restarts
+# and are shared between replicas); only misses are decomposed.
+def hp_filter_memoized(series, lamb=HP_LAMBDA):
+    keys = {name: memo_key(values, lamb) for name, values in series.items()}
+    trends = {name: _memo_get(key) for name, key in keys.items()}
+    missing = {name: np.asarray(series[name], dtype='float64') for name, trend in trends.items() if trend is None}
+    if missing:
+        with span('hp_filter', details={'series': len(missing)}):
+            decomposed = hp_filter_batch(missing, lamb)
+        for name, (cycle, trend) in decomposed.items():
+            trends[name] = _memo_put(keys[name], trend)
+    return {
+        name: _split(values, np.asarray(values, dtype='float64'), trends[name])
+        for name, values in series.items()
+    }
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+# Maximum number of points sent to the browser per chart
+POINT_BUDGET = int(os.environ.get('ECONCENTR_POINT_BUDGET', '1500'))
+
+
+# Largest-Triangle-Three-Buckets: indices of `threshold` points of (x, y) that keep the
+# visual shape of the line. The first and last points are always kept.
+def lttb_indices(x, y, threshold):
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype='int64')
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+        range_start = int(np.floor(i * every)) + 1
+        range_end = int(np.floor((i + 1) * every)) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(np.argmax(area))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+# LTTB indices within a point budget, always including the global minimum and maximum
+def downsample_indices(x, y, max_points=POINT_BUDGET):
+    y = np.asarray(y, dtype='float64')
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    indices = lttb_indices(x, y, max(max_points - 2, 3))
+    return np.union1d(indices, [int(np.argmin(y)), int(np.argmax(y))])
+
+
+# Rows of a date-indexed frame thinned with LTTB on one column
+def downsample_frame(df, column, max_points=POINT_BUDGET):
+    if len(df) <= max_points:
+        return df
+    x = df['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+    return df.iloc[downsample_indices(x, df[column].to_numpy(dtype='float64'), max_points)]
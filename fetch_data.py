@@ -1,76 +1,28 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import pandas as pd
 import wbdata
-import os
-
-# FRED API Key
-api_key = "467fe69919c067bbe2cf724fd86c501e"
-
-# Dictionary of FRED series IDs for key economic indicators for Ghana
-# These indicators help tell the story of the economy: inflation, GDP, growth, unemployment, interest rates, exchange rates, etc.
-fred_series = {
-    'inflation': 'FPCPITOTLZGGHA',  # Inflation, consumer prices (annual %)
-    'gdp': 'MKTGDPGHA646NWDB',  # Gross Domestic Product (current US$)
-    'gdp_per_capita': 'PCAGDPGHA646NWDB',  # GDP per capita (current US$)
-    'gdp_growth': 'GHANGDPRPCPPPT',  # Real GDP growth (annual %)
-    'unemployment': 'SLUEMTOTLZSGHA',  # Unemployment, total (% of total labor force)
-    'youth_unemployment': 'SLUEM1524ZSGHA',  # Youth unemployment rate (% ages 15-24)
-    'lending_rate': 'DDDI12GHA156NWDB',  # Lending interest rate (%)
-    'deposit_rate': 'DDDI01GHA156NWDB',  # Deposit interest rate (%)
-    'exchange_rate': 'FXRATEGHA618NUPN',  # Exchange rate to US Dollar (national currency per USD)
-    'current_account_balance_percent_gdp': 'BPBLTT01GHA637S'  # Current account balance (% of GDP)
-}
+from columnar_store import STORE_PATH, upsert_series
+from fred_client import MAX_WORKERS
+from gse import ingest_gse
+from persistence import flush
+from registry import ECONOMIC_INDICATORS
+from snapshots import plan_sync, sync_series
 
-# Generalized function to fetch data from FRED for multiple series
-def get_fred_data(series_dict):
-    os.makedirs('data', exist_ok=True)  # Ensure 'data' directory exists
-    
-    for name, series_id in series_dict.items():
-        url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={api_key}&file_type=json"
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            data = response.json().get('observations', [])
-            
-            if not data:
-                print(f"No data returned for series: {series_id}")
-                continue
-            
-            df = pd.DataFrame(data)[['date', 'value']]
-            df['value'] = pd.to_numeric(df['value'], errors='coerce')
-            df['date'] = pd.to_datetime(df['date'])
-            
-            # Save to CSV
-            csv_path = f'data/{name}.csv'
-            df.to_csv(csv_path, index=False)
-            print(f"Saved {name} data to {csv_path}")
-        
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data for {series_id}: {e}")
-
-# Fetch GSE data (manual CSV or API)
+# Fetch GSE data: the AFX feed is parsed as it streams in, each stock's new days are
+# appended to its history in data/gse/ and data/gse_stocks.csv holds the latest snapshot
 def get_gse_data():
     try:
-        # Fetch data from AFX GSE CSV URL (ensure the URL is correct)
-        url = "https://afx.kwayisi.org/gse/data.csv"  # Update with the correct URL if needed
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Save the raw content temporarily to a file
-        with open('temp_gse.csv', 'wb') as f:
-            f.write(response.content)
-        
-        df = pd.read_csv('temp_gse.csv')
-        
-        # Filter the data for top 10 stocks (you can modify this based on your needs)
-        df = df[['stock', 'price', 'ytd_return']].head(10)
-        
-        # Ensure 'data' directory exists
-        os.makedirs('data', exist_ok=True)
-        
-        df.to_csv('data/gse_stocks.csv', index=False)
+        df, appended = ingest_gse()
+        if appended:
+            print(f"Appended {sum(appended.values())} GSE price rows for {len(appended)} stocks")
         return df
     
     except requests.exceptions.RequestException as e:
@@ -79,10 +31,6 @@ def get_gse_data():
     except Exception as e:
         print(f"Error processing GSE data: {e}")
         return pd.DataFrame()
-    finally:
-        # Clean up temporary file
-        if os.path.exists('temp_gse.csv'):
-            os.remove('temp_gse.csv')
 
 # Hardcode bank data (for comparison)
 def get_bank_data():
@@ -105,19 +53,138 @@ def get_bank_data():
         print(f"Error processing bank data: {e}")
         return pd.DataFrame()
 
-# Run all functions to fetch data and save to CSV
-def fetch_all_data():
-    print("Fetching FRED economic indicators data...")
-    get_fred_data(fred_series)
+# Country x indicator matrix of FRED series to ingest, optionally filtered
+def build_matrix(countries=None, indicators=None):
+    jobs = []
+    for country, series in ECONOMIC_INDICATORS.items():
+        if countries and country not in countries:
+            continue
+        for name, series_id in series.items():
+            if indicators and name not in indicators:
+                continue
+            jobs.append((country, name, series_id))
+    return jobs
+
+
+# Ingest one FRED series into its snapshot and report status, rows and timing
+def ingest_series(country, name, series_id, incremental=True):
+    start = time.perf_counter()
+    result = {'job': 'fred', 'country': country, 'indicator': name, 'series_id': series_id}
+    try:
+        df, changed = sync_series(country, name, series_id, incremental)
+        result.update(status='ok', rows=len(df), changed=changed, frame=df)
+    except Exception as e:
+        result.update(status='failed', error=str(e))
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Run a non-FRED ingest job (GSE or banks) and report whether it produced data
+def ingest_table(job, fetch):
+    start = time.perf_counter()
+    df = fetch()
+    result = {'job': job, 'status': 'ok' if not df.empty else 'failed', 'rows': len(df)}
+    if df.empty:
+        result['error'] = f"No {job} data fetched"
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Fan the ingest matrix out across a worker pool. In dry-run mode no observations are
+# fetched: FRED's last_updated stamps are checked exactly as a real run checks them, and
+# the report lists each planned series as unchanged, full history or its observation_start.
+def fetch_all_data(countries=None, indicators=None, workers=MAX_WORKERS, incremental=True,
+                   dry_run=False, include_gse=True, include_banks=True):
+    jobs = build_matrix(countries, indicators)
+    if dry_run:
+        by_country = {}
+        for country, name, series_id in jobs:
+            by_country.setdefault(country, {})[name] = series_id
+        plans = {country: plan_sync(country, series, incremental) for country, series in by_country.items()}
+        report = []
+        for country, name, series_id in jobs:
+            unchanged, _, observation_starts = plans[country]
+            if name in unchanged:
+                observation_start = 'unchanged'
+            else:
+                observation_start = observation_starts.get(name) or 'full history'
+            report.append({'job': 'fred', 'country': country, 'indicator': name, 'series_id': series_id,
+                           'status': 'planned', 'observation_start': observation_start})
+        if include_gse:
+            report.append({'job': 'gse', 'status': 'planned'})
+        if include_banks:
+            report.append({'job': 'banks', 'status': 'planned'})
+        return report
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(ingest_series, country, name, series_id, incremental)
+                   for country, name, series_id in jobs]
+        if include_gse:
+            futures.append(executor.submit(ingest_table, 'gse', get_gse_data))
+        if include_banks:
+            futures.append(executor.submit(ingest_table, 'banks', get_bank_data))
+        report = [future.result() for future in futures]
+    
+    # Snapshots are written behind the fetches; wait until they are all on disk
+    flush()
+    
+    # Update the columnar store once per country with the series that changed
+    if os.path.exists(STORE_PATH):
+        changed = {}
+        for result in report:
+            if result.get('changed'):
+                changed.setdefault(result['country'], {})[result['indicator']] = result['frame']
+        for country, data_frames in changed.items():
+            upsert_series(country, data_frames)
     
-    print("Fetching GSE data...")
-    get_gse_data()
+    for result in report:
+        result.pop('frame', None)
+    return report
+
+
+# Print the ingest report as a table
+def print_report(report, elapsed):
+    for result in report:
+        target = f"{result['country']}/{result['indicator']} ({result['series_id']})" if result['job'] == 'fred' else result['job']
+        if result['status'] == 'planned':
+            detail = result.get('observation_start', '')
+        else:
+            detail = result.get('error') or f"{result['rows']} rows"
+        seconds = f"{result['seconds']:.3f}s" if 'seconds' in result else ''
+        print(f"{result['status']:<8} {target:<60} {seconds:>9}  {detail}")
+    counts = Counter(result['status'] for result in report)
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items()) or "nothing to do"
+    print(f"{summary} in {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest FRED, GSE and bank data into data/ for the dashboard")
+    parser.add_argument('--countries', nargs='+', choices=list(ECONOMIC_INDICATORS), help="Countries to ingest (default: all)")
+    parser.add_argument('--indicators', nargs='+', help="Indicators to ingest (default: all)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Number of parallel workers")
+    parser.add_argument('--full', action='store_true', help="Refetch full histories instead of appending new observations")
+    parser.add_argument('--dry-run', action='store_true', help="List the planned work without fetching anything")
+    parser.add_argument('--skip-gse', action='store_true', help="Do not fetch GSE stock data")
+    parser.add_argument('--skip-banks', action='store_true', help="Do not write bank data")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    known = {name for series in ECONOMIC_INDICATORS.values() for name in series}
+    unknown = set(args.indicators or []) - known
+    if unknown:
+        parser.error(f"unknown indicators: {', '.join(sorted(unknown))}")
     
-    print("Fetching bank data...")
-    get_bank_data()
+    start = time.perf_counter()
+    report = fetch_all_data(args.countries, args.indicators, args.workers, not args.full,
+                            args.dry_run, not args.skip_gse, not args.skip_banks)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        print(json.dumps({'seconds': round(elapsed, 3), 'results': report}, indent=2))
+    else:
+        print_report(report, elapsed)
     
-    print("Data fetching complete!")
+    # Non-zero exit status when any job failed, for cron/scheduler use
+    return 1 if any(result['status'] == 'failed' for result in report) else 0
 
-# Call the fetch_all_data function to execute all tasks
+# Run the ingest command
 if __name__ == "__main__":
-    fetch_all_data()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from fred_parser import CHUNK_SIZE, parse_observations
+from metrics import cache_result, span
+from request_scheduler import schedule
+from shared_cache import get_cache
+
+# FRED API Key
+FRED_API_KEY = os.environ.get('FRED_API_KEY', "467fe69919c067bbe2cf724fd86c501e")
+
+# Base URL of the FRED API (point this at a local stub server for offline runs)
+FRED_API_URL = os.environ.get('FRED_API_URL', "https://api.stlouisfed.org/fred")
+
+# Maximum number of series requests in flight at the same time
+MAX_WORKERS = int(os.environ.get('FRED_MAX_WORKERS', '6'))
+
+# Seconds to wait for FRED before giving up on a series
+REQUEST_TIMEOUT = 30
+
+# Seconds fetched observations stay in the shared cache for other processes and replicas
+CACHE_TTL = int(os.environ.get('FRED_CACHE_TTL', '300'))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# Shared keep-alive session so repeated fetches reuse pooled connections
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+# One observations request, parsed while the body streams in. The read-only
+# (dates, values) arrays are shared between coalesced callers and stored in the
+# shared cache for other processes.
+def _get_observations(session, params, cache_key):
+    with span('fred_request', series_id=params['series_id']):
+        response = session.get(f"{FRED_API_URL}/series/observations", params=params,
+                               timeout=REQUEST_TIMEOUT, stream=True)
+    with response:
+        response.raise_for_status()
+        with span('json_parse', series_id=params['series_id']):
+            data = parse_observations(response.iter_content(CHUNK_SIZE))
+    for array in data:
+        array.flags.writeable = False
+    try:
+        get_cache().set(cache_key, data, CACHE_TTL)
+    except Exception:
+        pass
+    return data
+
+
+# Value another process already fetched, if the shared cache has it
+def _cached(cache_key):
+    try:
+        entry = get_cache().get(cache_key)
+    except Exception:
+        return None
+    return entry.value if entry is not None else None
+
+
+# Fetch the observations of a single FRED series as a date/value DataFrame.
+# observation_start ('YYYY-MM-DD') limits the response to observations on or after that date.
+# Responses are shared across processes through the shared cache for CACHE_TTL seconds.
+# last_updated, the series' FRED stamp when the caller knows it, is part of the cache key,
+# so observations cached before a revision are never served together with its stamp.
+# Misses go through the central scheduler: rate limited, retried with backoff, and
+# collapsed with concurrent requests for the same series.
+def fetch_series(series_id, session=None, observation_start=None, last_updated=None):
+    session = session or get_session()
+    params = {
+        'series_id': series_id,
+        'api_key': FRED_API_KEY,
+        'file_type': 'json'
+    }
+    if observation_start:
+        params['observation_start'] = observation_start
+    cache_key = f"fred:arrays:{series_id}:{observation_start or ''}:{last_updated or ''}"
+    data = _cached(cache_key)
+    cache_result('fred_observations', data is not None)
+    if data is None:
+        data = schedule(cache_key, lambda: _get_observations(session, params, cache_key))
+    dates, values = data
+    if not len(dates):
+        return pd.DataFrame(columns=['date', 'value'])
+    return pd.DataFrame({'date': dates, 'value': values}, copy=False)
+
+
+# One series metadata request; returns FRED's last_updated stamp, or None if it has none
+def _get_last_updated(session, params, cache_key):
+    with span('fred_metadata', series_id=params['series_id']):
+        response = session.get(f"{FRED_API_URL}/series", params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        seriess = response.json().get('seriess', [])
+    last_updated = seriess[0].get('last_updated') if seriess else None
+    try:
+        get_cache().set(cache_key, last_updated, CACHE_TTL)
+    except Exception:
+        pass
+    return last_updated
+
+
+# When FRED last revised a series (its last_updated metadata). Comparing this stamp with
+# the one seen at the previous sync costs one small request instead of a full download.
+def fetch_last_updated(series_id, session=None):
+    session = session or get_session()
+    params = {
+        'series_id': series_id,
+        'api_key': FRED_API_KEY,
+        'file_type': 'json'
+    }
+    cache_key = f"fred:last_updated:{series_id}"
+    last_updated = _cached(cache_key)
+    cache_result('fred_metadata', last_updated is not None)
+    if last_updated is None:
+        last_updated = schedule(cache_key, lambda: _get_last_updated(session, params, cache_key))
+    return last_updated
+
+
+# Run fetch(name, series_id) for every series concurrently.
+# Returns (results, errors), both keyed by the names in series_dict. Any failure of one
+# series (HTTP error, malformed payload, parse error) lands in errors and never takes down
+# the rest of the batch.
+def _fetch_concurrently(series_dict, fetch, max_workers=None):
+    results = {}
+    errors = {}
+    if not series_dict:
+        return results, errors
+    max_workers = min(max_workers or MAX_WORKERS, len(series_dict))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(fetch, name, series_id) for name, series_id in series_dict.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+    return results, errors
+
+
+# Fetch several FRED series concurrently over the shared session.
+# observation_starts and stamps optionally map names to an observation_start and a
+# last_updated stamp for that series.
+# Returns (data_frames, errors), both keyed by the names in series_dict.
+def fetch_many(series_dict, max_workers=None, session=None, observation_starts=None, stamps=None):
+    session = session or get_session()
+    observation_starts = observation_starts or {}
+    stamps = stamps or {}
+    return _fetch_concurrently(
+        series_dict,
+        lambda name, series_id: fetch_series(series_id, session, observation_starts.get(name), stamps.get(name)),
+        max_workers
+    )
+
+
+# last_updated stamps of several series, fetched concurrently. Returns (stamps, errors).
+def fetch_many_last_updated(series_dict, max_workers=None, session=None):
+    session = session or get_session()
+    return _fetch_concurrently(
+        series_dict,
+        lambda name, series_id: fetch_last_updated(series_id, session),
+        max_workers
+    )
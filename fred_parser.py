@@ -0,0 +1,78 @@
+import re
+
+import numpy as np
+
+# Bytes read from the response per chunk
+CHUNK_SIZE = 64 * 1024
+
+# FRED's marker for a missing observation
+MISSING = b'.'
+
+_ARRAY_START = re.compile(rb'"observations"\s*:\s*\[')
+_DATE = re.compile(rb'"date"\s*:\s*"([^"]*)"')
+_VALUE = re.compile(rb'"value"\s*:\s*"([^"]*)"')
+# Observations are flat objects of string fields, so an object never contains braces
+_OBJECT = re.compile(rb'\{[^{}]*\}')
+
+
+# Parse the observations array of a FRED JSON response from an iterable of byte chunks.
+# Only the raw date and value fields are kept while the body streams in (no dicts, no
+# per-field Python strings); they become typed arrays in one vectorized step at the end.
+# Returns (dates, values) as datetime64[ns] and float64 arrays, with "." values as NaN.
+def parse_observations(chunks):
+    dates = []
+    values = []
+    buffer = b''
+    in_array = False
+    for chunk in chunks:
+        buffer += chunk
+        if not in_array:
+            match = _ARRAY_START.search(buffer)
+            if match is None:
+                continue
+            buffer = buffer[match.end():]
+            in_array = True
+        # Everything up to the last closing brace holds complete observations
+        end = buffer.rfind(b'}') + 1
+        if end:
+            _scan(buffer[:end], dates, values)
+            buffer = buffer[end:]
+    return to_arrays(dates, values)
+
+
+# Collect the date and value fields of the complete observations in region
+def _scan(region, dates, values):
+    found_dates = _DATE.findall(region)
+    found_values = _VALUE.findall(region)
+    # Objects are flat, so every opening brace starts one observation
+    if len(found_dates) == len(found_values) == region.count(b'{'):
+        dates.extend(found_dates)
+        values.extend(found_values)
+        return
+    # Some observation lacks a field: pair them up object by object instead
+    for match in _OBJECT.finditer(region):
+        date = _DATE.search(match.group())
+        value = _VALUE.search(match.group())
+        if date is not None and value is not None:
+            dates.append(date.group(1))
+            values.append(value.group(1))
+
+
+# Typed arrays from lists of raw date and value bytes; values that are not numbers become NaN
+def to_arrays(dates, values):
+    if not dates:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype='float64')
+    raw = np.array(values)
+    raw = np.where(raw == MISSING, b'nan', raw)
+    try:
+        numbers = raw.astype('float64')
+    except ValueError:
+        numbers = np.array([_to_float(value) for value in raw], dtype='float64')
+    return np.array(dates).astype('datetime64[ns]'), numbers
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
@@ -0,0 +1,107 @@
+import csv
+import os
+import re
+
+import pandas as pd
+import requests
+
+from persistence import atomic_write
+from snapshots import DATA_DIR, append_observations
+
+# AFX market data for the Ghana Stock Exchange
+GSE_URL = os.environ.get('ECONCENTR_GSE_URL', "https://afx.kwayisi.org/gse/data.csv")
+
+# One append-only <TICKER>.csv price history per stock
+GSE_HISTORY_DIR = os.path.join(DATA_DIR, 'gse')
+
+# Latest daily snapshot of every stock
+GSE_SNAPSHOT_PATH = os.path.join(DATA_DIR, 'gse_stocks.csv')
+
+# Columns kept per stock and day, after the date
+GSE_FIELDS = ['price', 'ytd_return']
+
+# Seconds to wait for AFX before giving up
+REQUEST_TIMEOUT = 30
+
+
+# Path of a ticker's history CSV; anything unusual in the ticker is replaced so it stays one file
+def history_path(ticker, history_dir=GSE_HISTORY_DIR):
+    return os.path.join(history_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', ticker) + '.csv')
+
+
+# Parse AFX CSV rows from an iterable of text lines into (date, stock, price, ytd_return).
+# Rows carry their own date when the feed has a date column, otherwise the trading day as_of.
+# A stock listed twice keeps its last row.
+def parse_gse_lines(lines, as_of):
+    records = []
+    for row in csv.DictReader(lines):
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        if not row.get('stock'):
+            continue
+        records.append({
+            'date': row.get('date') or as_of,
+            'stock': row['stock'],
+            **{field: row.get(field) for field in GSE_FIELDS}
+        })
+    df = pd.DataFrame.from_records(records, columns=['date', 'stock', *GSE_FIELDS])
+    df['date'] = pd.to_datetime(df['date']).dt.normalize()
+    for field in GSE_FIELDS:
+        df[field] = pd.to_numeric(df[field].astype(str).str.rstrip('%').str.replace(',', ''), errors='coerce')
+    df = df.dropna(subset=['price'])
+    return df.drop_duplicates(['date', 'stock'], keep='last').sort_values(['stock', 'date']).reset_index(drop=True)
+
+
+# Download and parse the AFX feed line by line as the response streams in; nothing touches disk
+def fetch_gse(url=GSE_URL, session=None, as_of=None):
+    as_of = as_of or pd.Timestamp.now(tz='UTC').strftime('%Y-%m-%d')
+    with (session or requests).get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        response.encoding = response.encoding or 'utf-8'
+        return parse_gse_lines(response.iter_lines(decode_unicode=True), as_of)
+
+
+# Append each stock's new days to its history. Days at or before a history's newest date
+# are skipped, so re-running an ingest on the same day writes nothing.
+# Returns {ticker: rows appended} for the tickers that gained rows.
+def append_history(df, history_dir=GSE_HISTORY_DIR):
+    os.makedirs(history_dir, exist_ok=True)
+    appended = {}
+    for ticker, rows in df.groupby('stock', sort=True):
+        written = append_observations(history_path(ticker, history_dir), rows[['date', *GSE_FIELDS]])
+        if written:
+            appended[ticker] = written
+    return appended
+
+
+# Replace the latest-snapshot CSV atomically with the newest day of each stock
+def write_snapshot(df, path=GSE_SNAPSHOT_PATH):
+    latest = df.sort_values('date').groupby('stock', sort=True).tail(1)
+    atomic_write(path, latest[['stock', *GSE_FIELDS, 'date']].to_csv(index=False, date_format='%Y-%m-%d').encode('utf-8'))
+    return latest
+
+
+# Price history of some or all tickers as one long (date, stock, price, ytd_return) frame
+def read_history(tickers=None, history_dir=GSE_HISTORY_DIR):
+    if tickers is None:
+        if not os.path.isdir(history_dir):
+            tickers = []
+        else:
+            tickers = sorted(os.path.splitext(name)[0] for name in os.listdir(history_dir) if name.endswith('.csv'))
+    frames = []
+    for ticker in tickers:
+        path = history_path(ticker, history_dir)
+        if os.path.exists(path):
+            frames.append(pd.read_csv(path, parse_dates=['date']).assign(stock=ticker))
+    if not frames:
+        return pd.DataFrame(columns=['date', 'stock', *GSE_FIELDS])
+    return pd.concat(frames, ignore_index=True)[['date', 'stock', *GSE_FIELDS]]
+
+
+# Fetch today's snapshot, extend the per-ticker histories and refresh the latest snapshot.
+# Returns (snapshot, appended) as from write_snapshot and append_history.
+def ingest_gse(url=GSE_URL, session=None, as_of=None):
+    df = fetch_gse(url, session, as_of)
+    if df.empty:
+        return df, {}
+    appended = append_history(df)
+    return write_snapshot(df), appended
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds, in seconds, of the stage duration histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Port of the Prometheus /metrics endpoint; unset disables it
+METRICS_PORT = os.environ.get('ECONCENTR_METRICS_PORT')
+
+# Every finished span is logged here as one JSON object per line
+logger = logging.getLogger('econcentr.metrics')
+
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+_server = None
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+# Record the duration of a stage, tagged with labels such as country and indicator.
+# Labels must take few distinct values, since each combination is its own histogram;
+# details (e.g. item counts) only go into the log line.
+def observe(stage, seconds, details=None, **labels):
+    key = (stage, _label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'event': 'span', 'stage': stage, 'seconds': round(seconds, 6), **(details or {}), **labels}))
+
+
+# Time the enclosed block as one span of a stage
+@contextmanager
+def span(stage, details=None, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, details, **labels)
+
+
+# Add to a counter, e.g. increment('cache_requests', cache='figure', result='hit')
+def increment(name, amount=1, **labels):
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+# Count a cache lookup as a hit or a miss
+def cache_result(cache, hit):
+    increment('cache_requests', cache=cache, result='hit' if hit else 'miss')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+# All metrics in the Prometheus text exposition format
+def prometheus_text():
+    with _lock:
+        histograms = {key: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']} for key, h in _histograms.items()}
+        counters = dict(_counters)
+    lines = [
+        '# HELP econcentr_stage_seconds Duration of dashboard and ingest stages.',
+        '# TYPE econcentr_stage_seconds histogram'
+    ]
+    for (stage, labels), histogram in sorted(histograms.items()):
+        base = (('stage', stage),) + labels
+        for bound, count in zip(BUCKETS, histogram['buckets']):
+            lines.append(f"econcentr_stage_seconds_bucket{_format_labels(base, [('le', bound)])} {count}")
+        lines.append(f"econcentr_stage_seconds_bucket{_format_labels(base, [('le', '+Inf')])} {histogram['count']}")
+        lines.append(f"econcentr_stage_seconds_sum{_format_labels(base)} {histogram['sum']:.6f}")
+        lines.append(f"econcentr_stage_seconds_count{_format_labels(base)} {histogram['count']}")
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f'# TYPE econcentr_{name}_total counter')
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"econcentr_{name}_total{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+# Plain-dict view of all metrics, for benchmark reports and structured logs
+def snapshot():
+    with _lock:
+        return {
+            'stages': [
+                {'stage': stage, **dict(labels), 'count': h['count'], 'seconds': round(h['sum'], 6)}
+                for (stage, labels), h in sorted(_histograms.items())
+            ],
+            'counters': [
+                {'name': name, **dict(labels), 'value': value}
+                for (name, labels), value in sorted(_counters.items())
+            ]
+        }
+
+
+# Forget everything recorded so far
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serve /metrics on a background thread, once per process
+def start_metrics_server(port=None):
+    global _server
+    port = port or METRICS_PORT
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(('0.0.0.0', int(port)), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+            return None
+    threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
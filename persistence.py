@@ -0,0 +1,181 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from metrics import increment, span
+
+# Seconds a write waits in the queue so later writes to the same file can replace it
+FLUSH_INTERVAL = float(os.environ.get('ECONCENTR_FLUSH_INTERVAL', '0.5'))
+
+logger = logging.getLogger('econcentr.persistence')
+
+
+# Serialize a date/value frame the way the snapshot CSVs are stored
+def frame_to_csv(df):
+    return df.to_csv(index=False).encode('utf-8')
+
+
+# Replace path with blob atomically: readers see the old file or the new one, never a mix
+def atomic_write(path, blob):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Exclusive lock on path shared by every process and thread, held on a <path>.lock file
+# next to it, so read-modify-write cycles on a shared file do not interleave
+@contextmanager
+def file_lock(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f'{path}.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Write-behind queue for snapshot files. Callers hand over a value and its serializer
+# and return immediately; one worker thread serializes and writes in batches. Writes
+# to the same path coalesce to the newest value, content equal to what is already on
+# disk is skipped by hash, and every write is an atomic replace. Paths queued with
+# lock=True are serialized and replaced under file_lock, so a serializer can merge in
+# what other processes wrote.
+class WriteBehindQueue:
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.in_flight = {}
+        self.digests = {}
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.flush_now = threading.Event()
+        self.worker = None
+
+    # Queue value to be written to path as serialize(value)
+    def submit(self, path, value, serialize=frame_to_csv, lock=False):
+        with self.lock:
+            self.pending[path] = (value, serialize, lock)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self.worker.start()
+            self.changed.notify_all()
+
+    # Newest value queued or being written for path, or None when the file is current
+    def peek(self, path):
+        with self.lock:
+            entry = self.pending.get(path) or self.in_flight.get(path)
+        return entry[0] if entry is not None else None
+
+    # Write everything queued now and wait for it; returns False on timeout
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.flush_now.set()
+        with self.lock:
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.changed.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.changed.wait()
+            self.flush_now.wait(self.flush_interval)
+            self.flush_now.clear()
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                self.in_flight = batch
+            with span('persist_batch', details={'files': len(batch)}):
+                for path, (value, serialize, lock) in batch.items():
+                    try:
+                        with file_lock(path) if lock else nullcontext():
+                            self._write(path, serialize(value))
+                    except Exception as e:
+                        increment('persist_writes', result='failed')
+                        logger.warning(f"Could not write {path}: {e}")
+            with self.lock:
+                self.in_flight = {}
+                self.changed.notify_all()
+
+    # Hash of the file on disk, rehashed only when its size or mtime changed since last seen
+    def _disk_digest(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        seen = (stat.st_mtime_ns, stat.st_size)
+        known = self.digests.get(path)
+        if known is None or known[0] != seen:
+            with open(path, 'rb') as f:
+                known = (seen, hashlib.sha256(f.read()).hexdigest())
+            self.digests[path] = known
+        return known[1]
+
+    def _write(self, path, blob):
+        digest = hashlib.sha256(blob).hexdigest()
+        if self._disk_digest(path) == digest:
+            increment('persist_writes', result='skipped')
+            return False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(path, blob)
+        stat = os.stat(path)
+        self.digests[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+        increment('persist_writes', result='written')
+        return True
+
+
+_queue = WriteBehindQueue()
+
+
+# Queue value to be written to path as serialize(value) off the calling thread;
+# by default value is a snapshot frame written as CSV. lock=True holds file_lock(path)
+# while serializing and writing.
+def write_behind(path, value, serialize=frame_to_csv, lock=False):
+    _queue.submit(path, value, serialize, lock)
+
+
+# Value queued for path that has not reached the disk yet, or None
+def pending_frame(path):
+    return _queue.peek(path)
+
+
+# Block until every queued write is on disk
+def flush(timeout=None):
+    return _queue.flush(timeout)
+
+
+# Queued writes must not be lost when a CLI run or the server exits
+atexit.register(flush)
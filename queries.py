@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from columnar_store import STORE_PATH, read_series
+from registry import ECONOMIC_INDICATORS
+from snapshots import has_snapshot, read_snapshot, snapshot_path
+
+# Ways to combine the observations that fall into one resampled period, or one rolling window
+AGGREGATIONS = ('mean', 'median', 'sum', 'min', 'max', 'first', 'last', 'std')
+
+
+# Countries that publish every requested indicator, in registry order
+def countries_with(indicators):
+    return [country for country, series in ECONOMIC_INDICATORS.items() if all(name in series for name in indicators)]
+
+
+# Long (country, indicator, date, value) frame of the requested series. Reads the columnar
+# store with country, indicator and date filters pushed down, and falls back to the CSV
+# snapshots for series the store does not hold yet.
+def load_long(indicators, countries, start=None, end=None, path=STORE_PATH):
+    columns = ['country', 'indicator', 'date', 'value']
+    frames = []
+    found = set()
+    if os.path.exists(path):
+        stored = read_series(countries=countries, indicators=indicators, start=start, end=end, columns=columns, path=path)
+        frames.append(stored)
+        found = set(zip(stored['country'], stored['indicator']))
+    for country in countries:
+        for indicator in indicators:
+            csv_path = snapshot_path(country, indicator)
+            if (country, indicator) in found or not has_snapshot(csv_path):
+                continue
+            df = read_snapshot(csv_path)
+            if start is not None:
+                df = df[df['date'] >= pd.Timestamp(start)]
+            if end is not None:
+                df = df[df['date'] <= pd.Timestamp(end)]
+            frames.append(df.assign(country=country, indicator=indicator)[columns])
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        frames = [pd.DataFrame({'country': [], 'indicator': [], 'date': pd.Series(dtype='datetime64[ms]'), 'value': []})]
+    long = pd.concat(frames, ignore_index=True)
+    # Same date resolution as the store, whichever source a series came from
+    long['date'] = long['date'].astype('datetime64[ms]')
+    return long
+
+
+# Number of periods in a year at a resampling frequency, e.g. 12 for 'MS' and 4 for 'QE'
+def periods_per_year(frequency):
+    return len(pd.date_range('2001-01-01', '2001-12-31', freq=frequency))
+
+
+# Start of the read window: far enough before start that the first reported period
+# still has its year-ago value and a full rolling window behind it
+def _read_start(start, frequency, yoy, rolling):
+    if start is None or (not yoy and not rolling):
+        return start
+    if rolling and frequency is None:
+        return None
+    lookback = pd.Timestamp(start)
+    if yoy:
+        lookback -= pd.DateOffset(years=1)
+    if rolling:
+        lookback -= pd.tseries.frequencies.to_offset(frequency) * rolling
+    # One extra period so a partially covered first bin is not aggregated from a fragment
+    return lookback - pd.tseries.frequencies.to_offset(frequency) if frequency else lookback
+
+
+# One aligned wide frame for a cross-country comparison. Rows are dates; columns are
+# (indicator, country) pairs, so frame['gdp'] holds one column per country.
+#   frequency: pandas offset alias to resample every series to ('MS', 'QE', 'YE', ...),
+#              combining the observations in each period with `how`; None keeps the
+#              native dates and outer-joins them.
+#   yoy: replace values by their percentage change on the same period a year earlier.
+#   rolling: aggregate over this many periods (or observations, without a frequency)
+#            with `rolling_how`, after the year-over-year step.
+def compare(indicators, countries=None, start=None, end=None, frequency=None, how='mean',
+            yoy=False, rolling=None, rolling_how='mean', path=STORE_PATH):
+    indicators = list(indicators)
+    unknown = [name for name in indicators if not any(name in series for series in ECONOMIC_INDICATORS.values())]
+    if unknown:
+        raise ValueError(f"Unknown indicator(s): {', '.join(unknown)}")
+    countries = list(countries) if countries is not None else countries_with(indicators)
+    for aggregation in (how, rolling_how):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation '{aggregation}'; use one of {', '.join(AGGREGATIONS)}")
+
+    long = load_long(indicators, countries, _read_start(start, frequency, yoy, rolling), end, path)
+    wide = long.pivot(index='date', columns=['indicator', 'country'], values='value').sort_index()
+    wanted = [(indicator, country) for indicator in indicators for country in countries if (indicator, country) in wide]
+    wide = wide.reindex(columns=pd.MultiIndex.from_tuples(wanted, names=['indicator', 'country']))
+
+    if frequency:
+        wide = wide.resample(frequency).agg(how)
+    if yoy:
+        if frequency:
+            prior = wide.shift(periods_per_year(frequency))
+        else:
+            prior = wide.shift(freq=pd.DateOffset(years=1)).reindex(wide.index)
+        wide = (wide / prior - 1) * 100
+    if rolling:
+        wide = wide.rolling(rolling, min_periods=rolling).agg(rolling_how)
+    if start is not None:
+        wide = wide[wide.index >= pd.Timestamp(start)]
+    wide.index.name = 'date'
+    return wide
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an aligned cross-country comparison as CSV")
+    parser.add_argument('indicators', nargs='+')
+    parser.add_argument('--countries', nargs='+', help="Default: every country with all the indicators")
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--frequency', help="Resampling frequency, e.g. MS, QE or YE")
+    parser.add_argument('--how', choices=AGGREGATIONS, default='mean')
+    parser.add_argument('--yoy', action='store_true', help="Year-over-year percentage change")
+    parser.add_argument('--rolling', type=int, help="Rolling window in periods")
+    parser.add_argument('--rolling-how', choices=AGGREGATIONS, default='mean')
+    parser.add_argument('--output', help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        wide = compare(args.indicators, args.countries, args.start, args.end, args.frequency, args.how,
+                       args.yoy, args.rolling, args.rolling_how)
+    except ValueError as e:
+        parser.error(str(e))
+    # Flatten to the <indicator>_<Country> naming used by the CSV snapshots
+    wide.columns = [f'{indicator}_{country}' for indicator, country in wide.columns]
+    wide.to_csv(args.output if args.output else sys.stdout)
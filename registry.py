@@ -0,0 +1,48 @@
+# Shared country/indicator registry used by the dashboard and the ingest command
+
+# Dictionary of countries and their FRED country codes
+COUNTRIES = {
+    'Ghana': 'GHA',
+    'Nigeria': 'NGA',
+    'Kenya': 'KEN'
+}
+
+# Dictionary of economic indicators with exact FRED series IDs per country
+ECONOMIC_INDICATORS = {
+    'Ghana': {
+        'inflation': 'FPCPITOTLZGGHA',  # Inflation, consumer prices (annual %)
+        'gdp': 'MKTGDPGHA646NWDB',  # Gross Domestic Product (current US$)
+        'gdp_per_capita': 'PCAGDPGHA646NWDB',  # GDP per capita (current US$)
+        'gdp_growth': 'GHANGDPRPCPPPT',  # Real GDP growth (annual %)
+        'unemployment': 'SLUEMTOTLZSGHA',  # Unemployment, total (% of total labor force)
+        'youth_unemployment': 'SLUEM1524ZSGHA',  # Youth unemployment rate (% ages 15-24)
+        'lending_rate': 'DDDI12GHA156NWDB',  # Lending interest rate (%)
+        'deposit_rate': 'DDDI01GHA156NWDB',  # Deposit interest rate (%)
+        'exchange_rate': 'FXRATEGHA618NUPN',  # Exchange rate to US Dollar (national currency per USD)
+        'current_account_balance_percent_gdp': 'BPBLTT01GHA637S'  # Current account balance (% of GDP)
+    },
+    'Nigeria': {
+        'inflation': 'FPCPITOTLZGNGA',
+        'gdp': 'MKTGDPNGA646NWDB',
+        'gdp_per_capita': 'NYGDPPCAPCDNGA',
+        'gdp_growth': 'NGANGDPRPCPPPT',
+        'unemployment': 'SLUEMTOTLZSNGA',
+        'youth_unemployment': 'SLUEM1524ZSNGA',
+        'lending_rate': 'DDDI12NGA156NWDB',
+        'deposit_rate': 'DDDI01NGA156NWDB',
+        'exchange_rate': 'EXNGUS',
+        'current_account_balance_percent_gdp': 'BPBLTT01NGA637S'
+    },
+    'Kenya': {
+        'inflation': 'FPCPITOTLZGKEN',
+        'gdp': 'MKTGDPKEA646NWDB',
+        'gdp_per_capita': 'NYGDPPCAPCDKEN',
+        'gdp_growth': 'KENNGDPRPCPPPT',
+        'unemployment': 'SLUEMTOTLZSKEN',
+        'youth_unemployment': 'SLUEM1524ZSKEN',
+        'lending_rate': 'DDDI12KEA156NWDB',
+        'deposit_rate': 'DDDI01KEA156NWDB',
+        'exchange_rate': 'EXKZUS',
+        'current_account_balance_percent_gdp': 'BPBLTT01KEA637S'
+    }
+}
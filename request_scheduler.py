@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Upstream requests allowed per second on average (FRED allows 120 per minute per key)
+RATE_LIMIT = float(os.environ.get('FRED_RATE_LIMIT', '2'))
+
+# Requests that may be sent back to back before the rate limit applies
+BURST = int(os.environ.get('FRED_BURST', '10'))
+
+# Attempts per request, including the first one
+MAX_ATTEMPTS = int(os.environ.get('FRED_MAX_ATTEMPTS', '4'))
+
+# Base and cap, in seconds, of the jittered exponential wait between attempts
+RETRY_BASE = 0.5
+RETRY_MAX_WAIT = 30
+
+
+# Token bucket shared by every thread in the process
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Block until a token is available, then take it
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    # Take a token if one is available right now; never blocks
+    def try_acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+_bucket = TokenBucket(RATE_LIMIT, BURST)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_upstream_calls = 0
+_coalesced_calls = 0
+
+
+# Rate limiting (429), server errors and connection problems are worth retrying
+def is_retryable(error):
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is not None and (response.status_code == 429 or response.status_code >= 500)
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+# Call fn under the token bucket, retrying retryable errors with jittered exponential backoff
+def call_with_retry(fn):
+    global _upstream_calls
+    retrying = Retrying(
+        retry=retry_if_exception(is_retryable),
+        wait=wait_random_exponential(multiplier=RETRY_BASE, max=RETRY_MAX_WAIT),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True
+    )
+    for attempt in retrying:
+        with attempt:
+            _bucket.acquire()
+            with _in_flight_lock:
+                _upstream_calls += 1
+            return fn()
+
+
+# Run fn for key, collapsing concurrent calls with the same key into one in-flight call.
+# Every caller gets the leader's result (or exception), so results must not be mutated.
+def schedule(key, fn):
+    global _coalesced_calls
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _in_flight[key] = future
+        else:
+            _coalesced_calls += 1
+    if not leader:
+        return future.result()
+    try:
+        result = call_with_retry(fn)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+# Upstream attempts made and calls answered by another caller's in-flight request
+def stats():
+    with _in_flight_lock:
+        return {'upstream_calls': _upstream_calls, 'coalesced_calls': _coalesced_calls}
@@ -0,0 +1,285 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+import numpy as np
+
+# Where the shared cache lives: sqlite:///<path>, redis://host:port/db or memory://
+CACHE_URL = os.environ.get('ECONCENTR_CACHE_URL', 'sqlite:///' + os.path.join('data', 'cache', 'shared.sqlite3'))
+
+# Seconds between sweeps that drop expired entries from the shared cache
+PURGE_INTERVAL = float(os.environ.get('ECONCENTR_CACHE_PURGE_INTERVAL', '600'))
+
+# Filesystems where SQLite's WAL mode is unsafe: WAL keeps its index in shared memory
+# next to the database, which processes on different hosts cannot share
+NETWORK_FILESYSTEMS = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'afs', 'ceph', 'glusterfs', 'lustre', 'fuse.sshfs')
+
+# Mount table read to find the filesystem a cache file lives on (Linux)
+MOUNTS_PATH = '/proc/mounts'
+
+logger = logging.getLogger('econcentr.shared_cache')
+
+# A cached value with its content version (ETag) and expiry time (None = never expires)
+CacheEntry = namedtuple('CacheEntry', ['value', 'version', 'expires_at'])
+
+
+# Content version of a serialized value, usable as an ETag
+def content_version(blob):
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+# Serialize a cached value without pickle, since the cache is shared with other processes
+# and loading a pickle from it could run arbitrary code. Supported values are JSON data,
+# a numpy array, a tuple of arrays and a {name: array} dict; arrays are stored with
+# np.save and read back with allow_pickle=False, so object arrays are refused.
+def encode(value):
+    buffer = io.BytesIO()
+    if isinstance(value, np.ndarray):
+        buffer.write(b'A')
+        np.save(buffer, value, allow_pickle=False)
+    elif isinstance(value, tuple) and all(isinstance(item, np.ndarray) for item in value):
+        buffer.write(b'T')
+        np.savez(buffer, *value)
+    elif isinstance(value, dict) and value and all(isinstance(item, np.ndarray) for item in value.values()):
+        buffer.write(b'D')
+        np.savez(buffer, **value)
+    else:
+        buffer.write(b'J')
+        buffer.write(json.dumps(value).encode('utf-8'))
+    return buffer.getvalue()
+
+
+# Value from encode's bytes; raises ValueError for anything else
+def decode(blob):
+    kind, payload = blob[:1], io.BytesIO(blob[1:])
+    if kind == b'A':
+        return np.load(payload, allow_pickle=False)
+    if kind in (b'T', b'D'):
+        with np.load(payload, allow_pickle=False) as arrays:
+            if kind == b'T':
+                return tuple(arrays[f'arr_{i}'] for i in range(len(arrays.files)))
+            return {name: arrays[name] for name in arrays.files}
+    if kind == b'J':
+        return json.loads(payload.getvalue())
+    raise ValueError("Not a shared cache value")
+
+
+# Interface every shared cache backend implements. Backends store opaque bytes;
+# serialization, versioning and expiry are handled here.
+class CacheBackend(ABC):
+    @abstractmethod
+    def _get_raw(self, key):
+        ...
+
+    @abstractmethod
+    def _set_raw(self, key, blob, version, expires_at):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    # Drop expired entries; a no-op for backends that expire entries themselves
+    def purge_expired(self):
+        pass
+
+    # Entry for key, or None when it is missing or expired
+    def get(self, key):
+        raw = self._get_raw(key)
+        if raw is None:
+            return None
+        blob, version, expires_at = raw
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return CacheEntry(decode(bytes(blob)), version, expires_at)
+
+    # Store value for ttl seconds (None = no expiry) and return its entry
+    def set(self, key, value, ttl=None):
+        blob = encode(value)
+        entry = CacheEntry(value, content_version(blob), time.time() + ttl if ttl is not None else None)
+        self._set_raw(key, blob, entry.version, entry.expires_at)
+        return entry
+
+    # Cached entry for key, computing and storing it on a miss
+    def get_or_set(self, key, compute, ttl=None):
+        entry = self.get(key)
+        if entry is None:
+            entry = self.set(key, compute(), ttl)
+        return entry
+
+
+# In-process backend, for single-process runs and tests
+class MemoryCache(CacheBackend):
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _get_raw(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def _set_raw(self, key, blob, version, expires_at):
+        with self.lock:
+            self.entries[key] = (blob, version, expires_at)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self.lock:
+            for key in [key for key, (_, _, expires_at) in self.entries.items() if expires_at is not None and expires_at < now]:
+                del self.entries[key]
+
+
+# SQLite file backend shared by every process that can see the file
+# Type of the filesystem holding path, from the longest matching mount point; None when
+# the mount table cannot be read (e.g. outside Linux)
+def filesystem_type(path):
+    try:
+        with open(MOUNTS_PATH) as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fs_type = '', None
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+        if inside and len(mount_point) >= len(best):
+            best, fs_type = mount_point, mount_type
+    return fs_type
+
+
+# SQLite file shared by the processes of one host. WAL lets readers run during writes, but
+# it needs shared memory, so on a network filesystem the cache falls back to the rollback
+# journal. Processes on several hosts should share a Redis cache instead.
+class SQLiteCache(CacheBackend):
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fs_type = filesystem_type(directory or '.')
+        self.journal_mode = 'WAL'
+        if fs_type is not None and fs_type.lower() in NETWORK_FILESYSTEMS:
+            self.journal_mode = 'DELETE'
+            logger.warning(f"{path} is on a {fs_type} filesystem; not using WAL. Use a redis:// cache to share it between hosts.")
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, version TEXT NOT NULL, expires_at REAL)"
+            )
+
+    # One connection per thread
+    def _connect(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            self.local.connection = connection
+        return connection
+
+    def _get_raw(self, key):
+        row = self._connect().execute(
+            "SELECT value, version, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        return row
+
+    def _set_raw(self, key, blob, version, expires_at):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, version, expires_at) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), version, expires_at)
+            )
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    # Drop expired rows
+    def purge_expired(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+
+# Backend over any Redis-compatible client exposing get, set(ex=...) and delete
+class RedisCache(CacheBackend):
+    def __init__(self, client, prefix='econcentr:'):
+        self.client = client
+        self.prefix = prefix
+
+    # Values are stored as a JSON [version, expires_at] header line followed by the blob
+    def _get_raw(self, key):
+        payload = self.client.get(self.prefix + key)
+        if payload is None:
+            return None
+        header, blob = payload.split(b'\n', 1)
+        version, expires_at = json.loads(header)
+        return blob, version, expires_at
+
+    def _set_raw(self, key, blob, version, expires_at):
+        ttl = None if expires_at is None else max(1, int(expires_at - time.time() + 1))
+        header = json.dumps([version, expires_at]).encode('utf-8')
+        self.client.set(self.prefix + key, header + b'\n' + blob, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+# Build a backend from a cache URL
+def cache_from_url(url):
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):])
+    if url.startswith('memory://'):
+        return MemoryCache()
+    if url.startswith('redis://'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("A redis:// cache URL needs the 'redis' package. Please install it using 'pip install redis'.")
+        return RedisCache(redis.Redis.from_url(url))
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_purger = None
+
+
+# Background sweep dropping expired entries every PURGE_INTERVAL seconds
+def _purge_loop():
+    while True:
+        time.sleep(PURGE_INTERVAL)
+        try:
+            get_cache().purge_expired()
+        except Exception as e:
+            logger.warning(f"Could not purge the shared cache: {e}")
+
+
+# Process-wide shared cache configured by ECONCENTR_CACHE_URL
+def get_cache():
+    global _cache, _purger
+    with _cache_lock:
+        if _cache is None:
+            _cache = cache_from_url(CACHE_URL)
+        if _purger is None and PURGE_INTERVAL > 0:
+            _purger = threading.Thread(target=_purge_loop, name='cache-purge', daemon=True)
+            _purger.start()
+        return _cache
+
+
+# Replace the process-wide cache, e.g. with a stand-in backend
+def set_cache(cache):
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,329 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from array_series import ArraySeries
+from columnar_store import STORE_PATH, read_series, upsert_behind
+from fred_client import fetch_many, fetch_many_last_updated
+from metrics import span
+from persistence import atomic_write, file_lock, frame_to_csv, pending_frame, write_behind
+import versions
+
+# Directory holding the per-country snapshot CSVs
+DATA_DIR = 'data'
+
+# Seconds before a country's snapshots are considered stale and refreshed in the background
+MAX_AGE = 300
+
+# Number of bytes read from the end of a snapshot to find its last row
+_TAIL_BYTES = 4096
+
+# Latest snapshots per country as immutable ArraySeries shared by every session.
+# Each value is replaced as a whole, never mutated in place.
+# Refresh times are tracked per (country, indicator); _running and _queued hold the
+# indicators of each country's current and next background refresh.
+_snapshots = {}
+_refreshed_at = {}
+_refresh_errors = {}
+_refreshing = set()
+_running = {}
+_queued = {}
+_lock = threading.Lock()
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-refresh')
+
+
+# Path of the snapshot CSV for one country's indicator
+def snapshot_path(country, indicator):
+    return os.path.join(DATA_DIR, f'{indicator}_{country}.csv')
+
+
+# True when a snapshot exists on disk or is queued to be written
+def has_snapshot(csv_path):
+    return pending_frame(csv_path) is not None or os.path.exists(csv_path)
+
+
+# Load a date/value snapshot CSV from data/ with typed columns.
+# A write still in the write-behind queue is returned instead of the older file.
+def read_snapshot(csv_path):
+    pending = pending_frame(csv_path)
+    if pending is not None:
+        return pending.copy()
+    df = pd.read_csv(csv_path)
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+# Date of the newest observation stored in a snapshot CSV, or None if there is none
+def read_high_water_mark(csv_path):
+    pending = pending_frame(csv_path)
+    if pending is not None:
+        return pending['date'].max() if not pending.empty else None
+    if not os.path.exists(csv_path):
+        return None
+    with open(csv_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - _TAIL_BYTES))
+        lines = f.read().decode('utf-8', errors='ignore').strip().splitlines()
+    if not lines or lines[-1].startswith('date'):
+        return None
+    try:
+        return pd.Timestamp(lines[-1].split(',')[0])
+    except ValueError:
+        return None
+
+
+# First date to request from FRED so only observations after the snapshot come back
+def next_observation_start(csv_path):
+    mark = read_high_water_mark(csv_path)
+    if mark is None:
+        return None
+    return (mark + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+# Append observations newer than the snapshot's high-water mark; returns the number of rows written.
+# New rows go to the end of the file with one appending write, so a poll costs the size of
+# what it adds, not of the history. The first write of a file is an atomic replace. Appends
+# run under file_lock, so concurrent ingests never write the same rows twice.
+def append_observations(csv_path, df):
+    with file_lock(csv_path):
+        mark = read_high_water_mark(csv_path)
+        if mark is None:
+            atomic_write(csv_path, frame_to_csv(df))
+            return len(df)
+        new_rows = df[df['date'] > mark]
+        if new_rows.empty:
+            return 0
+        blob = new_rows.to_csv(header=False, index=False).encode('utf-8')
+        with open(csv_path, 'a+b') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                blob = b'\n' + blob
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+    return len(new_rows)
+
+
+# Persist freshly fetched observations to a snapshot, merging them after the stored ones
+# when they were fetched from observation_start. The file is written by the write-behind
+# queue (atomic replace, skipped when unchanged), so callers never wait on disk.
+# Returns (df, changed) where df is the full series.
+def write_fetched(csv_path, df, observation_start=None):
+    if observation_start and has_snapshot(csv_path):
+        stored = read_snapshot(csv_path)
+        mark = stored['date'].max() if not stored.empty else None
+        new_rows = df if mark is None else df[df['date'] > mark]
+        if new_rows.empty:
+            return stored, False
+        df = pd.concat([stored, new_rows], ignore_index=True)
+    if df.empty:
+        return df, False
+    write_behind(csv_path, df)
+    return df, True
+
+
+# Bring one indicator's snapshot up to date with FRED, the same way sync_country does,
+# and record its version. Raises when the series could not be fetched. Returns (df, changed).
+def sync_series(country, name, series_id, incremental=True):
+    data_frames, changed, errors = _sync(country, {name: series_id}, incremental)
+    if name in errors:
+        raise errors[name]
+    return data_frames.get(name, pd.DataFrame(columns=['date', 'value'])), name in changed
+
+
+# Ask FRED when each series was last updated and split off the ones whose stamp still
+# matches the one recorded at their last sync. Returns (unchanged names, stamps); series
+# whose metadata cannot be fetched are treated as changed.
+def check_upstream(country, indicators, csv_paths):
+    with span('metadata_check', country=country):
+        stamps, _ = fetch_many_last_updated(indicators)
+    unchanged = {
+        name for name, stamp in stamps.items()
+        if stamp is not None and stamp == versions.last_updated(country, name) and has_snapshot(csv_paths[name])
+    }
+    return unchanged, stamps
+
+
+# Bring one country's snapshots up to date with FRED.
+# In incremental mode series whose FRED last_updated stamp has not moved are not
+# downloaded at all, so a refresh with no upstream changes costs one metadata request per
+# series. Every synced series is recorded in versions with its content hash.
+# Returns (data_frames, errors). Indicators that failed to refresh are served from their
+# stored snapshot when there is one; indicators with no data anywhere are left out.
+def sync_country(country, indicators, incremental=True):
+    data_frames, changed, errors = _sync(country, indicators, incremental)
+    if changed and os.path.exists(STORE_PATH):
+        upsert_behind(country, changed)
+    return data_frames, errors
+
+
+# How a sync fetches each series: unchanged ones are skipped, and a moved stamp means FRED
+# may have revised old observations too, so those series are downloaded in full. Only
+# series whose stamp could not be fetched fall back to asking for the observations after
+# the snapshot. Returns (unchanged names, stamps, observation_starts).
+def plan_sync(country, indicators, incremental=True):
+    if not incremental:
+        return set(), {}, {}
+    csv_paths = {name: snapshot_path(country, name) for name in indicators}
+    unchanged, stamps = check_upstream(country, indicators, csv_paths)
+    observation_starts = {
+        name: next_observation_start(path) for name, path in csv_paths.items()
+        if name not in unchanged and stamps.get(name) is None
+    }
+    return unchanged, stamps, observation_starts
+
+
+# Returns (data_frames, changed, errors)
+def _sync(country, indicators, incremental):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    csv_paths = {name: snapshot_path(country, name) for name in indicators}
+    unchanged, stamps, observation_starts = plan_sync(country, indicators, incremental)
+    to_fetch = {name: series_id for name, series_id in indicators.items() if name not in unchanged}
+    with span('fetch_country', country=country):
+        fetched, errors = fetch_many(to_fetch, observation_starts=observation_starts, stamps=stamps)
+    data_frames = {}
+    changed = {}
+    for name, csv_path in csv_paths.items():
+        if name in errors or name in unchanged:
+            # Serve the stored series when it is current or a refresh failed
+            if has_snapshot(csv_path):
+                df = read_snapshot(csv_path)
+                if not df.empty:
+                    data_frames[name] = df
+            continue
+        df, was_changed = write_fetched(csv_path, fetched[name], observation_starts.get(name))
+        if was_changed:
+            changed[name] = df
+        if not df.empty:
+            versions.record(country, name, df, stamps.get(name))
+            data_frames[name] = df
+    return data_frames, changed, errors
+
+
+# Read whatever snapshots exist locally for a country, without touching the network.
+# Uses one read of the columnar store when it exists and falls back to the CSVs.
+def load_country_snapshots(country, indicators):
+    with span('load_snapshots', country=country):
+        return _load_country_snapshots(country, indicators)
+
+
+def _load_country_snapshots(country, indicators):
+    data_frames = {}
+    if os.path.exists(STORE_PATH):
+        stored = read_series(countries=[country], indicators=list(indicators), columns=['indicator', 'date', 'value'])
+        for name, df in stored.groupby('indicator', sort=False):
+            data_frames[name] = df[['date', 'value']].reset_index(drop=True)
+    for name in indicators:
+        csv_path = snapshot_path(country, name)
+        # A snapshot still in the write-behind queue is newer than the store
+        if name in data_frames and pending_frame(csv_path) is None:
+            continue
+        if has_snapshot(csv_path):
+            df = read_snapshot(csv_path)
+            if not df.empty:
+                data_frames[name] = df
+    return {name: data_frames[name] for name in indicators if name in data_frames}
+
+
+# Swap freshly loaded frames into the shared snapshots as ArraySeries. A series whose
+# content did not change keeps its existing instance, so everything cached on or keyed
+# by it downstream (dropna, version, HP trend, figures) stays a hit.
+# Returns the country's series for the given frames.
+def share_series(country, data_frames):
+    fresh = {name: ArraySeries.from_frame(df) for name, df in data_frames.items()}
+    with _lock:
+        merged = dict(_snapshots.get(country, {}))
+        for name, series in fresh.items():
+            current = merged.get(name)
+            if current is None or current.version != series.version:
+                merged[name] = series
+        _snapshots[country] = merged
+    return {name: merged[name] for name in data_frames}
+
+
+# Background job: sync some of a country's indicators and swap the result in atomically.
+# Indicators requested while it ran are refreshed next, in one follow-up job.
+def _refresh_country(country, indicators):
+    try:
+        data_frames, errors = sync_country(country, indicators)
+    except Exception as e:
+        data_frames, errors = {}, {name: e for name in indicators}
+    share_series(country, data_frames)
+    with _lock:
+        country_errors = {name: e for name, e in _refresh_errors.get(country, {}).items() if name not in indicators}
+        country_errors.update(errors)
+        _refresh_errors[country] = country_errors
+        now = time.monotonic()
+        for name in indicators:
+            _refreshed_at[(country, name)] = now
+        queued = _queued.pop(country, None)
+        if queued:
+            _running[country] = queued
+        else:
+            _running.pop(country, None)
+            _refreshing.discard(country)
+    if queued:
+        _refresher.submit(_refresh_country, country, queued)
+
+
+# Schedule a background refresh for a country. While one is queued or running, the
+# indicators it does not cover are queued for the next one. Returns False when
+# everything asked for is already covered.
+def request_refresh(country, indicators):
+    with _lock:
+        if country in _refreshing:
+            queued = _queued.setdefault(country, {})
+            added = {name: series_id for name, series_id in indicators.items()
+                     if name not in _running.get(country, {}) and name not in queued}
+            queued.update(added)
+            return bool(added)
+        _refreshing.add(country)
+        _running[country] = dict(indicators)
+    _refresher.submit(_refresh_country, country, dict(indicators))
+    return True
+
+
+# Stale-while-revalidate read: return the local snapshots of the requested indicators,
+# as shared read-only ArraySeries, immediately and refresh the ones older than max_age
+# from FRED in the background.
+# Indicators are loaded on first request, so callers can ask for just what they show.
+def get_country_data(country, indicators, max_age=MAX_AGE):
+    with _lock:
+        data_frames = _snapshots.get(country, {})
+    missing = {name: series_id for name, series_id in indicators.items() if name not in data_frames}
+    if missing:
+        loaded = load_country_snapshots(country, missing)
+        with _lock:
+            data_frames = dict(_snapshots.get(country, {}))
+            for name, df in loaded.items():
+                data_frames.setdefault(name, ArraySeries.from_frame(df))
+            _snapshots[country] = data_frames
+    now = time.monotonic()
+    stale = {}
+    with _lock:
+        for name, series_id in indicators.items():
+            refreshed_at = _refreshed_at.get((country, name))
+            if refreshed_at is None or now - refreshed_at > max_age:
+                stale[name] = series_id
+    if stale:
+        request_refresh(country, stale)
+    return {name: data_frames[name] for name in indicators if name in data_frames}
+
+
+# Errors from the most recent background refresh of a country, keyed by indicator
+def last_refresh_errors(country):
+    with _lock:
+        return dict(_refresh_errors.get(country, {}))
+
+
+# True while a background refresh for the country, or for one of its indicators, is queued or running
+def is_refreshing(country, indicator=None):
+    with _lock:
+        if indicator is None:
+            return country in _refreshing
+        return indicator in _running.get(country, {}) or indicator in _queued.get(country, {})
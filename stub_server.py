@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from registry import ECONOMIC_INDICATORS
+from request_scheduler import TokenBucket
+
+# Directory holding the CSV fixtures replayed by the stub
+FIXTURE_DIR = 'data'
+
+# AFX-style GSE prices replayed by the stub, one trading day per request
+GSE_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures', 'gse_data.csv')
+
+
+# Fixture CSV for each registered series ID: <indicator>_<Country>.csv, falling back
+# to the legacy Ghana <indicator>.csv files
+def fixture_paths(fixture_dir=FIXTURE_DIR):
+    paths = {}
+    for country, series in ECONOMIC_INDICATORS.items():
+        for name, series_id in series.items():
+            candidates = [os.path.join(fixture_dir, f'{name}_{country}.csv')]
+            if country == 'Ghana':
+                candidates.append(os.path.join(fixture_dir, f'{name}.csv'))
+            for path in candidates:
+                if os.path.exists(path):
+                    paths[series_id] = path
+                    break
+    return paths
+
+
+# FRED-style observations for a fixture, with missing values as "."
+def load_observations(path):
+    df = pd.read_csv(path, dtype={'date': str})
+    values = df['value'].map(lambda value: '.' if pd.isna(value) else repr(float(value)))
+    return [
+        {'realtime_start': '2025-01-01', 'realtime_end': '2025-01-01', 'date': date, 'value': value}
+        for date, value in zip(df['date'], values)
+    ]
+
+
+# GSE fixture split into one CSV body per trading day, oldest first. A fixture without
+# a date column is a single snapshot and is served as it is.
+def load_gse_days(path=GSE_FIXTURE):
+    if not os.path.exists(path):
+        return []
+    df = pd.read_csv(path, dtype=str)
+    if 'date' not in df:
+        return [df.to_csv(index=False).encode('utf-8')]
+    return [day.to_csv(index=False).encode('utf-8') for _, day in df.groupby('date', sort=True)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, payload, content_type='application/json'):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/gse/data.csv'):
+            endpoint = 'gse'
+        elif url.path.endswith('/series/observations'):
+            endpoint = 'observations'
+        elif url.path.endswith('/series'):
+            endpoint = 'metadata'
+        else:
+            self._send(404, {'error_code': 404, 'error_message': 'Not Found'})
+            return
+        if not self._admit(endpoint):
+            return
+        if endpoint == 'gse':
+            self._send_gse()
+        elif endpoint == 'metadata':
+            self._send_metadata(query.get('series_id'))
+        else:
+            self._send_observations(query)
+
+    # Apply the configured latency, rate limit and error rate; False when the request
+    # was answered with an injected failure
+    def _admit(self, endpoint):
+        server = self.server
+        delay = server.latency + server.jitter * server.random()
+        if delay > 0:
+            time.sleep(delay)
+        if server.limiter is not None and not server.limiter.try_acquire():
+            server.count(endpoint, 'throttled')
+            self._send(429, {'error_code': 429, 'error_message': 'Too Many Requests.  Exceeded Rate Limit'})
+            return False
+        if server.error_rate and server.random() < server.error_rate:
+            server.count(endpoint, 'failed')
+            self._send(500, {'error_code': 500, 'error_message': 'Internal Server Error'})
+            return False
+        return True
+
+    def _send_observations(self, query):
+        observations = self.server.observations.get(query.get('series_id'))
+        if observations is None:
+            self.server.count('observations', 'unknown_series')
+            self._send(400, {'error_code': 400, 'error_message': 'Bad Request.  The series does not exist.'})
+            return
+        self.server.count_call(query.get('series_id'))
+        start = query.get('observation_start')
+        if start:
+            observations = [row for row in observations if row['date'] >= start]
+        self._send(200, {'count': len(observations), 'observations': observations})
+
+    # FRED-style series metadata for /series?series_id=
+    def _send_metadata(self, series_id):
+        last_updated = self.server.last_updated(series_id)
+        if last_updated is None:
+            self.server.count('metadata', 'unknown_series')
+            self._send(400, {'error_code': 400, 'error_message': 'Bad Request.  The series does not exist.'})
+            return
+        self.server.count_call(series_id, self.server.metadata_calls)
+        self._send(200, {'seriess': [{'id': series_id, 'last_updated': last_updated}]})
+
+    # The next trading day of the GSE fixture, staying on the last one once replayed
+    def _send_gse(self):
+        body = self.server.next_gse_day()
+        if body is None:
+            self._send(404, b'No GSE fixture\n', 'text/plain')
+            return
+        self.server.count('gse', 'ok')
+        self._send(200, body, 'text/csv; charset=utf-8')
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Stand-in for FRED and the AFX GSE feed, replaying the CSV fixtures.
+#   latency, jitter: every request waits latency plus up to jitter seconds
+#   error_rate: fraction of requests answered with a 500
+#   rate_limit: requests per second allowed (bursts of up to one second's worth);
+#               the rest get FRED's 429 response. None disables the limit.
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixture_dir=FIXTURE_DIR, gse_fixture=GSE_FIXTURE,
+                 latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, seed=None):
+        super().__init__(address, StubHandler)
+        self.paths = fixture_paths(fixture_dir)
+        self.observations = {series_id: load_observations(path) for series_id, path in self.paths.items()}
+        self.loaded_at = {series_id: os.path.getmtime(path) for series_id, path in self.paths.items()}
+        self.gse_days = load_gse_days(gse_fixture)
+        self.gse_day = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.limiter = TokenBucket(rate_limit, max(1, int(rate_limit))) if rate_limit else None
+        self.rng = random.Random(seed)
+        self.calls = {}
+        self.metadata_calls = {}
+        self.outcomes = {}
+        self.calls_lock = threading.Lock()
+
+    def random(self):
+        with self.calls_lock:
+            return self.rng.random()
+
+    def count_call(self, series_id, calls=None):
+        calls = self.calls if calls is None else calls
+        with self.calls_lock:
+            calls[series_id] = calls.get(series_id, 0) + 1
+        self.count('metadata' if calls is self.metadata_calls else 'observations', 'ok')
+
+    # Count a request by endpoint and outcome (ok, failed, throttled, unknown_series)
+    def count(self, endpoint, outcome):
+        with self.calls_lock:
+            key = (endpoint, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+
+    # Requests so far as {endpoint: {outcome: count}}
+    def stats(self):
+        with self.calls_lock:
+            outcomes = dict(self.outcomes)
+        stats = {}
+        for (endpoint, outcome), count in sorted(outcomes.items()):
+            stats.setdefault(endpoint, {})[outcome] = count
+        return stats
+
+    def reset_stats(self):
+        with self.calls_lock:
+            self.calls.clear()
+            self.metadata_calls.clear()
+            self.outcomes.clear()
+
+    def next_gse_day(self):
+        with self.calls_lock:
+            if not self.gse_days:
+                return None
+            body = self.gse_days[min(self.gse_day, len(self.gse_days) - 1)]
+            self.gse_day += 1
+        return body
+
+    # last_updated stamp of a series in FRED's format, or None for an unknown series.
+    # Taken from the fixture's modification time when it was loaded, so it only changes
+    # along with the observations served.
+    def last_updated(self, series_id):
+        if series_id not in self.loaded_at:
+            return None
+        return pd.Timestamp(self.loaded_at[series_id], unit='s', tz='UTC').strftime('%Y-%m-%d %H:%M:%S-00')
+
+    # Base URL to use as FRED_API_URL
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/fred"
+
+    # Feed URL to use as ECONCENTR_GSE_URL
+    @property
+    def gse_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/gse/data.csv"
+
+
+# Start a stub server on a background thread (port 0 picks a free port); options as for StubServer
+def start_stub_server(port=0, fixture_dir=FIXTURE_DIR, host='127.0.0.1', **options):
+    server = StubServer((host, port), fixture_dir, **options)
+    threading.Thread(target=server.serve_forever, name='stub-server', daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve FRED observations and the GSE feed from local fixtures")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--gse-fixture', default=GSE_FIXTURE)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument('--rate-limit', type=float, help="Requests per second before answering 429")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    server = StubServer(('127.0.0.1', args.port), args.fixtures, args.gse_fixture, args.latency, args.jitter,
+                        args.error_rate, args.rate_limit, args.seed)
+    print(f"Stub server with {len(server.observations)} FRED series at {server.url} "
+          f"and {len(server.gse_days)} GSE trading days at {server.gse_url}")
+    server.serve_forever()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shared_cache  # noqa: E402
+
+
+# Every test gets an empty shared cache under its own tmp_path instead of data/cache
+@pytest.fixture(autouse=True)
+def shared_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, 'CACHE_URL', 'sqlite:///' + str(tmp_path / 'cache' / 'shared.sqlite3'))
+    monkeypatch.setattr(shared_cache, '_cache', None)
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from columnar_store import migrate_csvs, read_series
+
+
+def write_csv(path, dates, value):
+    pd.DataFrame({'date': dates, 'value': [value] * len(dates)}).to_csv(path, index=False)
+
+
+def test_migration_prefers_country_then_iso_then_bare_names(tmp_path):
+    write_csv(tmp_path / 'gdp.csv', ['2019-01-01', '2020-01-01', '2021-01-01'], 3.0)
+    write_csv(tmp_path / 'gdp_GHA.csv', ['2020-01-01', '2021-01-01'], 2.0)
+    write_csv(tmp_path / 'gdp_Ghana.csv', ['2021-01-01'], 1.0)
+    write_csv(tmp_path / 'gdp_NGA.csv', ['2021-01-01'], 4.0)
+    pd.DataFrame({'Symbol': ['MTNGH'], 'Price': [1.5]}).to_csv(tmp_path / 'gse_data.csv', index=False)
+    path = str(tmp_path / 'series.parquet')
+    assert migrate_csvs(str(tmp_path), path) == 4
+    stored = read_series(path=path)
+    ghana = stored[stored['country'] == 'Ghana'].set_index('date')['value']
+    assert ghana.to_dict() == {
+        pd.Timestamp('2019-01-01'): 3.0,
+        pd.Timestamp('2020-01-01'): 2.0,
+        pd.Timestamp('2021-01-01'): 1.0
+    }
+    assert stored[stored['country'] == 'Nigeria']['value'].tolist() == [4.0]
+    assert set(stored['indicator']) == {'gdp'}
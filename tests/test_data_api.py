@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_api
+from columnar_store import STORE_PATH, write_store
+
+
+# Run one GET through the ASGI app; returns (status, headers, body) with lower-case header names
+def get(path, headers=None):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        'client': ('127.0.0.1', 1), 'server': ('testserver', 80)
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(data_api.app(scope, receive, send))
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, body
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dates = pd.date_range('2000-01-01', periods=40, freq='YS')
+    rows = [
+        pd.DataFrame({'country': 'Ghana', 'indicator': 'gdp', 'date': dates, 'value': np.arange(40) * 10.0}),
+        pd.DataFrame({'country': 'Nigeria', 'indicator': 'gdp', 'date': dates, 'value': np.r_[0.0, np.arange(1, 40) * 5.0]})
+    ]
+    write_store(pd.concat(rows, ignore_index=True), STORE_PATH)
+
+
+def test_etag_answers_304_per_encoding():
+    status, headers, body = get('/series/Ghana/gdp')
+    assert status == 200 and headers['vary'] == 'Accept-Encoding'
+    assert 'content-encoding' not in headers
+    assert len(json.loads(body)['observations']) == 40
+    status, gzip_headers, gzip_body = get('/series/Ghana/gdp', {'Accept-Encoding': 'gzip'})
+    assert status == 200 and gzip_headers['content-encoding'] == 'gzip'
+    assert gzip.decompress(gzip_body) == body
+    assert gzip_headers['etag'] != headers['etag']
+    status, not_modified, body = get('/series/Ghana/gdp', {'If-None-Match': headers['etag']})
+    assert status == 304 and body == b'' and not_modified['vary'] == 'Accept-Encoding'
+    # The identity ETag does not validate the gzip representation
+    assert get('/series/Ghana/gdp', {'If-None-Match': headers['etag'], 'Accept-Encoding': 'gzip'})[0] == 200
+
+
+def test_small_responses_are_not_gzipped():
+    status, headers, body = get('/series/Ghana/gdp?start=2039-01-01', {'Accept-Encoding': 'gzip'})
+    assert status == 200 and len(body) < data_api.GZIP_MIN_SIZE
+    assert 'content-encoding' not in headers and headers['vary'] == 'Accept-Encoding'
+
+
+def test_registered_series_without_data_is_404():
+    status, _, body = get('/series/Kenya/gdp')
+    assert status == 404 and 'No data stored' in json.loads(body)['error']
+    assert get('/series/Nowhere/gdp')[0] == 404
+
+
+@pytest.mark.parametrize('rolling', ['0', '-2', 'x'])
+def test_rolling_below_one_is_400(rolling):
+    status, _, body = get(f'/compare?indicators=gdp&countries=Ghana&rolling={rolling}')
+    assert status == 400 and json.loads(body)['error'] == 'rolling must be a positive integer'
+
+
+def test_yoy_from_zero_is_null():
+    status, _, body = get('/compare?indicators=gdp&countries=Nigeria&yoy=1')
+    assert status == 200
+    observations = json.loads(body)['observations']
+    assert observations[1]['gdp_Nigeria'] is None
+    assert observations[2]['gdp_Nigeria'] == pytest.approx(100.0)
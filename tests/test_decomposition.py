@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.filters.hp_filter import hpfilter
+
+from decomposition import HP_LAMBDA, hp_filter_batch, hp_filter_memoized
+
+# Largest difference from statsmodels' hpfilter allowed in the trend and cycle
+TOLERANCE = 1e-8
+
+
+def random_walks(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f'series_{i}': rng.normal(size=n).cumsum() * 100 for i, n in enumerate(lengths)}
+
+
+@pytest.mark.parametrize('lamb', [HP_LAMBDA, 100, 1600])
+def test_batch_matches_statsmodels(lamb):
+    series = random_walks([3, 4, 5, 27, 34, 61, 65, 65, 400])
+    decomposed = hp_filter_batch(series, lamb)
+    for name, values in series.items():
+        cycle, trend = hpfilter(values, lamb=lamb)
+        np.testing.assert_allclose(decomposed[name][1], trend, rtol=0, atol=TOLERANCE)
+        np.testing.assert_allclose(decomposed[name][0], cycle, rtol=0, atol=TOLERANCE)
+
+
+def test_memoized_matches_batch_on_miss_and_hit():
+    series = random_walks([27, 65, 65])
+    expected = hp_filter_batch(series)
+    for _ in range(2):
+        decomposed = hp_filter_memoized(series)
+        for name in series:
+            np.testing.assert_allclose(decomposed[name][1], expected[name][1], rtol=0, atol=TOLERANCE)
+            np.testing.assert_allclose(decomposed[name][0], expected[name][0], rtol=0, atol=TOLERANCE)
+
+
+def test_pandas_input_keeps_index_and_names():
+    values = pd.Series(random_walks([30])['series_0'], index=pd.date_range('1990', periods=30, freq='YS'), name='gdp')
+    cycle, trend = hp_filter_batch({'gdp': values})['gdp']
+    assert cycle.name == 'gdp_cycle' and trend.name == 'gdp_trend'
+    assert cycle.index.equals(values.index)
+    pd.testing.assert_series_equal(cycle + trend, values, check_names=False)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import downsample_frame, downsample_indices, lttb_indices
+
+
+def noisy_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype='float64')
+    y = np.cumsum(rng.normal(size=n))
+    return x, y
+
+
+@pytest.mark.parametrize('n, max_points', [(10_000, 1500), (5_000, 100), (2_000, 5)])
+def test_keeps_budget_endpoints_and_extremes(n, max_points):
+    x, y = noisy_series(n)
+    # Spikes that a plain stride would skip
+    y[1234] = y.max() + 50
+    y[777] = y.min() - 50
+    indices = downsample_indices(x, y, max_points)
+    assert len(indices) <= max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert int(np.argmax(y)) in indices
+    assert int(np.argmin(y)) in indices
+
+
+def test_indices_are_sorted_and_unique():
+    x, y = noisy_series(10_000, seed=1)
+    indices = downsample_indices(x, y, 500)
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_short_series_is_untouched():
+    x, y = noisy_series(100)
+    np.testing.assert_array_equal(downsample_indices(x, y, 1500), np.arange(100))
+
+
+def test_lttb_returns_exactly_threshold_points():
+    x, y = noisy_series(1_000)
+    indices = lttb_indices(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_downsample_frame_keeps_rows_in_date_order():
+    x, y = noisy_series(5_000, seed=2)
+    df = pd.DataFrame({'date': pd.date_range('1900-01-01', periods=5_000, freq='D'), 'value': y})
+    thinned = downsample_frame(df, 'value', 300)
+    assert len(thinned) <= 300
+    assert thinned['date'].is_monotonic_increasing
+    assert thinned['date'].iloc[0] == df['date'].iloc[0]
+    assert thinned['date'].iloc[-1] == df['date'].iloc[-1]
+    assert thinned['value'].max() == df['value'].max()
+    assert thinned['value'].min() == df['value'].min()
+    pd.testing.assert_frame_equal(thinned, df.loc[thinned.index])
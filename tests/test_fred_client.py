@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+import fred_client
+import request_scheduler
+from request_scheduler import TokenBucket
+from stub_server import start_stub_server
+
+SERIES = {'gdp': 'MKTGDPGHA646NWDB', 'inflation': 'FPCPITOTLZGGHA', 'unemployment': 'SLUEMTOTLZSGHA'}
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    for name in SERIES:
+        pd.DataFrame({'date': ['2020-01-01', '2021-01-01', '2022-01-01'], 'value': [1.0, None, 3.0]}).to_csv(
+            tmp_path / f'{name}_Ghana.csv', index=False)
+    server = start_stub_server(fixture_dir=str(tmp_path))
+    monkeypatch.setattr(fred_client, 'FRED_API_URL', server.url)
+    monkeypatch.setattr(request_scheduler, '_bucket', TokenBucket(1000, 1000))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_many_returns_every_series(stub):
+    data_frames, errors = fred_client.fetch_many(SERIES, observation_starts={'gdp': '2021-01-01'})
+    assert errors == {}
+    assert list(data_frames['inflation']['date']) == list(pd.to_datetime(['2020-01-01', '2021-01-01', '2022-01-01']))
+    assert data_frames['inflation']['value'].isna().tolist() == [False, True, False]
+    assert len(data_frames['gdp']) == 2
+    # A second batch is answered from the shared cache
+    fred_client.fetch_many(SERIES, observation_starts={'gdp': '2021-01-01'})
+    assert stub.calls == {series_id: 1 for series_id in SERIES.values()}
+
+
+def test_one_bad_series_does_not_fail_the_batch(stub):
+    stub.observations[SERIES['inflation']][0]['date'] = '2020-13-45'
+    data_frames, errors = fred_client.fetch_many({**SERIES, 'missing': 'NOSUCHSERIES'})
+    assert set(data_frames) == {'gdp', 'unemployment'}
+    assert set(errors) == {'inflation', 'missing'}
+    assert isinstance(errors['inflation'], ValueError)
+    assert errors['missing'].response.status_code == 400
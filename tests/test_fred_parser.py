@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fred_parser import parse_observations
+
+
+def fred_body(observations, **extra):
+    return json.dumps({'count': len(observations), 'offset': 0, **extra, 'observations': observations}).encode('utf-8')
+
+
+def observation(date, value):
+    return {'realtime_start': '2025-01-01', 'realtime_end': '2025-01-01', 'date': date, 'value': value}
+
+
+# The parse path fred_client used before streaming
+def parse_json(body):
+    df = pd.DataFrame(json.loads(body).get('observations', []), columns=['date', 'value'])
+    return pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ns]'), pd.to_numeric(df['value'], errors='coerce').to_numpy()
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def assert_parsed(actual, expected):
+    np.testing.assert_array_equal(actual[0], expected[0])
+    np.testing.assert_array_equal(actual[1], expected[1])
+
+
+@pytest.fixture
+def body():
+    dates = pd.date_range('1990-01-01', periods=200, freq='MS').strftime('%Y-%m-%d')
+    values = np.random.default_rng(0).normal(100, 10, len(dates)).round(4).astype(str)
+    values[::7] = '.'
+    return fred_body([observation(date, value) for date, value in zip(dates, values)])
+
+
+def test_matches_json_path_in_one_chunk(body):
+    assert_parsed(parse_observations([body]), parse_json(body))
+
+
+# Chunk sizes that split the body inside keys, values and objects
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 1000])
+def test_matches_json_path_across_chunk_boundaries(body, size):
+    assert_parsed(parse_observations(chunked(body, size)), parse_json(body))
+
+
+def test_split_inside_the_array_marker():
+    body = fred_body([observation('2020-01-01', '1.5')])
+    split = body.index(b'"observations"') + 5
+    dates, values = parse_observations([body[:split], body[split:]])
+    np.testing.assert_array_equal(dates, np.array(['2020-01-01'], dtype='datetime64[ns]'))
+    np.testing.assert_array_equal(values, [1.5])
+
+
+def test_missing_values_and_non_numbers_are_nan():
+    body = fred_body([observation('2020-01-01', '.'), observation('2021-01-01', 'n/a'), observation('2022-01-01', '2')])
+    dates, values = parse_observations([body])
+    assert len(dates) == 3
+    np.testing.assert_array_equal(values, [np.nan, np.nan, 2.0])
+
+
+# Observations lacking a date or a value are dropped without shifting the others, even
+# when the counts of dates and values in a chunk happen to match
+@pytest.mark.parametrize('size', [1, 16, 10_000])
+def test_observations_with_missing_fields_are_dropped(size):
+    observations = [
+        observation('2020-01-01', '1'),
+        {'realtime_start': '2025-01-01', 'date': '2020-02-01'},
+        {'realtime_start': '2025-01-01', 'value': '99'},
+        observation('2020-04-01', '4'),
+    ]
+    complete = fred_body([observations[0], observations[3]])
+    assert_parsed(parse_observations(chunked(fred_body(observations), size)), parse_json(complete))
+
+
+def test_empty_and_absent_observations():
+    for body in (fred_body([]), json.dumps({'error_code': 400}).encode('utf-8')):
+        dates, values = parse_observations([body])
+        assert dates.dtype == np.dtype('datetime64[ns]') and len(dates) == 0
+        assert values.dtype == np.dtype('float64') and len(values) == 0
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from gse import append_history, history_path, parse_gse_lines, read_history
+
+
+def day(date, prices):
+    lines = ['stock,price,ytd_return'] + [f'{stock},{price},1.5%' for stock, price in prices.items()]
+    return parse_gse_lines(lines, date)
+
+
+def test_history_only_grows_with_new_days(tmp_path):
+    history_dir = str(tmp_path / 'gse')
+    assert append_history(day('2025-01-02', {'MTNGH': 1.5, 'GCB': 6.0}), history_dir) == {'GCB': 1, 'MTNGH': 1}
+    # The same day again, e.g. a re-run ingest, writes nothing
+    assert append_history(day('2025-01-02', {'MTNGH': 1.6, 'GCB': 6.0}), history_dir) == {}
+    assert append_history(day('2025-01-03', {'MTNGH': 1.7}), history_dir) == {'MTNGH': 1}
+    with open(history_path('MTNGH', history_dir), 'rb') as f:
+        assert f.read() == b'date,price,ytd_return\n2025-01-02,1.5,1.5\n2025-01-03,1.7,1.5\n'
+    history = read_history(history_dir=history_dir)
+    assert history.groupby('stock').size().to_dict() == {'GCB': 1, 'MTNGH': 2}
+    assert history[history['stock'] == 'MTNGH']['date'].tolist() == list(pd.to_datetime(['2025-01-02', '2025-01-03']))
+
+
+def test_append_repairs_a_missing_final_newline(tmp_path):
+    history_dir = str(tmp_path / 'gse')
+    append_history(day('2025-01-02', {'GCB': 6.0}), history_dir)
+    path = history_path('GCB', history_dir)
+    with open(path, 'rb+') as f:
+        f.truncate(len(f.read()) - 1)
+    assert append_history(day('2025-01-03', {'GCB': 6.1}), history_dir) == {'GCB': 1}
+    assert read_history(['GCB'], history_dir)['price'].tolist() == [6.0, 6.1]
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pandas as pd
+
+import persistence
+from persistence import WriteBehindQueue, frame_to_csv
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def frame(value):
+    return pd.DataFrame({'date': ['2020-01-01'], 'value': [value]})
+
+
+# Serializer that counts its calls
+class Counting:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, df):
+        self.calls.append(df['value'].iloc[0])
+        return frame_to_csv(df)
+
+
+def test_writes_to_one_path_coalesce_to_the_newest(tmp_path):
+    queue = WriteBehindQueue(flush_interval=0.5)
+    path = str(tmp_path / 'data' / 'gdp.csv')
+    serialize = Counting()
+    for value in range(5):
+        queue.submit(path, frame(float(value)), serialize)
+    assert queue.peek(path)['value'].iloc[0] == 4.0
+    assert queue.flush(timeout=10)
+    assert serialize.calls == [4.0]
+    assert pd.read_csv(path)['value'].tolist() == [4.0]
+    assert queue.peek(path) is None
+
+
+def test_content_already_on_disk_is_not_rewritten(tmp_path, monkeypatch):
+    writes = []
+    atomic_write = persistence.atomic_write
+    monkeypatch.setattr(persistence, 'atomic_write', lambda path, blob: (writes.append(path), atomic_write(path, blob)))
+    queue = WriteBehindQueue(flush_interval=0)
+    path = str(tmp_path / 'gdp.csv')
+    queue.submit(path, frame(1.0))
+    queue.flush(timeout=10)
+    queue.submit(path, frame(1.0))
+    queue.flush(timeout=10)
+    assert writes == [path]
+    # A change on disk by someone else is noticed, so the same content is written again
+    with open(path, 'w') as f:
+        f.write('date,value\n')
+    queue.submit(path, frame(1.0))
+    queue.flush(timeout=10)
+    assert writes == [path, path]
+    assert pd.read_csv(path)['value'].tolist() == [1.0]
+
+
+def test_queued_writes_are_flushed_at_exit(tmp_path):
+    path = str(tmp_path / 'gdp.csv')
+    script = textwrap.dedent(f'''
+        import pandas as pd
+        from persistence import write_behind
+        write_behind({path!r}, pd.DataFrame({{'date': ['2020-01-01'], 'value': [2.0]}}))
+    ''')
+    # A flush interval far longer than the test: only the exit hook can write the file
+    env = {**os.environ, 'PYTHONPATH': REPO, 'ECONCENTR_FLUSH_INTERVAL': '600'}
+    subprocess.run([sys.executable, '-c', script], env=env, cwd=tmp_path, check=True, timeout=120)
+    assert pd.read_csv(path)['value'].tolist() == [2.0]
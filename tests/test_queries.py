@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_store import write_store
+from queries import compare
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Snapshot fallbacks are looked up under data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    months = pd.date_range('2018-01-01', '2021-12-01', freq='MS')
+    frames = [
+        pd.DataFrame({'country': 'Ghana', 'indicator': 'inflation', 'date': months, 'value': np.arange(len(months), dtype=float)}),
+        pd.DataFrame({'country': 'Nigeria', 'indicator': 'inflation', 'date': months[::3], 'value': 10.0})
+    ]
+    path = str(tmp_path / 'series.parquet')
+    write_store(pd.concat(frames, ignore_index=True), path)
+    return path
+
+
+def test_resample_aligns_countries(store):
+    wide = compare(['inflation'], ['Ghana', 'Nigeria', 'Kenya'], frequency='QE', path=store)
+    assert list(wide.columns) == [('inflation', 'Ghana'), ('inflation', 'Nigeria')]
+    assert len(wide) == 16
+    assert wide[('inflation', 'Ghana')].iloc[0] == 1.0
+    assert wide[('inflation', 'Nigeria')].eq(10.0).all()
+    assert compare(['inflation'], ['Ghana'], frequency='QE', how='sum', path=store).iloc[0, 0] == 3.0
+
+
+def test_yoy_uses_the_same_period_a_year_earlier(store):
+    wide = compare(['inflation'], ['Ghana'], start='2019-01-01', frequency='MS', yoy=True, path=store)
+    assert wide.index[0] == pd.Timestamp('2019-01-01')
+    # Jan 2019 is observation 12, Jan 2018 observation 0
+    assert np.isinf(wide.iloc[0, 0])
+    assert wide.iloc[1, 0] == pytest.approx((13 / 1 - 1) * 100)
+    native = compare(['inflation'], ['Nigeria'], start='2019-01-01', yoy=True, path=store)
+    assert native.iloc[:, 0].eq(0.0).all()
+
+
+def test_rolling_reads_enough_history_before_start(store):
+    wide = compare(['inflation'], ['Ghana'], start='2020-01-01', end='2020-12-01', frequency='MS',
+                   rolling=3, rolling_how='max', path=store)
+    assert wide.index[0] == pd.Timestamp('2020-01-01') and len(wide) == 12
+    assert wide.iloc[:, 0].tolist() == list(np.arange(24, 36, dtype=float))
+    assert compare(['inflation'], ['Ghana'], rolling=2, path=store).iloc[:3, 0].isna().tolist() == [True, False, False]
+
+
+def test_unknown_names_are_rejected(store):
+    with pytest.raises(ValueError, match='Unknown indicator'):
+        compare(['nope'], path=store)
+    with pytest.raises(ValueError, match='Unsupported aggregation'):
+        compare(['inflation'], how='mode', path=store)
@@ -0,0 +1,78 @@
+import threading
+
+import pandas as pd
+import pytest
+import requests
+
+import request_scheduler
+from request_scheduler import TokenBucket, call_with_retry, schedule
+from stub_server import start_stub_server
+
+SERIES_ID = 'MKTGDPGHA646NWDB'
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    pd.DataFrame({'date': ['2020-01-01', '2021-01-01'], 'value': [1.0, 2.0]}).to_csv(tmp_path / 'gdp_Ghana.csv', index=False)
+    return str(tmp_path)
+
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch):
+    # A bucket of its own, so the tests neither wait on nor drain the process-wide one
+    monkeypatch.setattr(request_scheduler, '_bucket', TokenBucket(1000, 1000))
+    monkeypatch.setattr(request_scheduler, 'RETRY_BASE', 0.05)
+    monkeypatch.setattr(request_scheduler, 'RETRY_MAX_WAIT', 0.5)
+
+
+@pytest.fixture
+def stub(fixture_dir, request):
+    server = start_stub_server(fixture_dir=fixture_dir, **getattr(request, 'param', {}))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server):
+    response = requests.get(f'{server.url}/series/observations', params={'series_id': SERIES_ID}, timeout=10)
+    response.raise_for_status()
+    return response.json()['observations']
+
+
+@pytest.mark.parametrize('stub', [{'latency': 0.3}], indirect=True)
+def test_concurrent_callers_share_one_upstream_call(stub):
+    callers = 20
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def call(i):
+        barrier.wait()
+        results[i] = schedule(('observations', SERIES_ID), lambda: fetch(stub))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stub.calls == {SERIES_ID: 1}
+    assert all(result is results[0] for result in results)
+    assert len(results[0]) == 2
+
+
+@pytest.mark.parametrize('stub', [{'rate_limit': 2}], indirect=True)
+def test_throttled_requests_are_retried(stub, monkeypatch):
+    monkeypatch.setattr(request_scheduler, 'MAX_ATTEMPTS', 20)
+    for _ in range(4):
+        assert len(call_with_retry(lambda: fetch(stub))) == 2
+    stats = stub.stats()['observations']
+    assert stats['ok'] == 4 and stats['throttled'] > 0
+
+
+@pytest.mark.parametrize('stub', [{'rate_limit': 0.01}], indirect=True)
+def test_throttling_becomes_an_error_after_max_attempts(stub, monkeypatch):
+    monkeypatch.setattr(request_scheduler, 'MAX_ATTEMPTS', 3)
+    fetch(stub)
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        call_with_retry(lambda: fetch(stub))
+    assert error.value.response.status_code == 429
+    assert stub.stats()['observations'] == {'ok': 1, 'throttled': 3}
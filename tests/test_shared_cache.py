@@ -0,0 +1,72 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import shared_cache
+from array_series import ArraySeries
+from shared_cache import CacheBackend, MemoryCache, SQLiteCache, decode, encode
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / 'cache.sqlite3'))
+
+
+def test_round_trips_every_cached_kind(cache):
+    dates = np.array(['2020-01-01', '2021-01-01'], dtype='datetime64[ns]')
+    values = np.array([1.5, np.nan])
+    cache.set('stamp', '2025-01-01 08:00:00-05')
+    cache.set('arrays', (dates, values))
+    cache.set('trend', values)
+    cache.set('series', ArraySeries(dates, values, {'trend': values}).to_arrays())
+    assert cache.get('stamp').value == '2025-01-01 08:00:00-05'
+    got_dates, got_values = cache.get('arrays').value
+    np.testing.assert_array_equal(got_dates, dates)
+    np.testing.assert_array_equal(got_values, values)
+    np.testing.assert_array_equal(cache.get('trend').value, values)
+    series = ArraySeries.from_arrays(cache.get('series').value)
+    np.testing.assert_array_equal(series.derived['trend'], values)
+    assert series.version == ArraySeries(dates, values, {'trend': values}).version
+
+
+def test_pickles_are_never_loaded(cache):
+    blob = pickle.dumps({'a': 1})
+    cache._set_raw('evil', blob, 'v', None)
+    with pytest.raises(ValueError):
+        cache.get('evil')
+    with pytest.raises(ValueError):
+        decode(encode(np.array([object()], dtype=object)))
+
+
+def test_expired_entries_are_hidden_and_purged(cache):
+    cache.set('old', 'x', ttl=-1)
+    cache.set('new', 'y', ttl=60)
+    assert cache.get('old') is None
+    cache.purge_expired()
+    assert cache._get_raw('old') is None
+    assert cache.get('new').value == 'y'
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(CacheBackend):
+        def _get_raw(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sqlite_cache_avoids_wal_on_network_filesystems(tmp_path, monkeypatch):
+    mounts = tmp_path / 'mounts'
+    mounts.write_text(f'/dev/vda / ext4 rw 0 0\nserver:/export {tmp_path / "nfs"} nfs4 rw 0 0\n')
+    monkeypatch.setattr(shared_cache, 'MOUNTS_PATH', str(mounts))
+    assert shared_cache.filesystem_type(str(tmp_path / 'nfs' / 'cache')) == 'nfs4'
+    local = SQLiteCache(str(tmp_path / 'local' / 'cache.sqlite3'))
+    remote = SQLiteCache(str(tmp_path / 'nfs' / 'cache' / 'cache.sqlite3'))
+    assert local._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert remote._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    remote.set('stamp', 'x')
+    assert remote.get('stamp').value == 'x'
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_cache
+import transforms
+from array_series import ArraySeries
+from transforms import plan, run_transforms
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(transforms, '_memo', OrderedDict())
+    yield
+    transforms._reset_pool()
+
+
+def annual(values, start='1990-01-01'):
+    dates = pd.date_range(start, periods=len(values), freq='YS').to_numpy(dtype='datetime64[ns]')
+    return ArraySeries(dates, np.asarray(values, dtype='float64'))
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    return {
+        'gdp': annual(100 + rng.normal(size=40).cumsum()),
+        'lending_rate': annual(np.full(40, 20.0)),
+        'inflation': annual(np.linspace(5, 15, 30), start='2000-01-01')
+    }
+
+
+def test_plan_pulls_in_dependencies(series):
+    nodes = plan(['hp_cycle'], series, ['gdp'])
+    assert nodes == {
+        'gdp_hp_cycle': ('hp_cycle', ('gdp', 'gdp_hp_trend')),
+        'gdp_hp_trend': ('hp_trend', ('gdp',))
+    }
+    with pytest.raises(ValueError, match='Unknown transform'):
+        plan(['nope'], series)
+
+
+def test_outputs_follow_dependency_order(series):
+    result = run_transforms(series, ['hp_cycle', 'real_interest_rate'], ['gdp'], workers=0)
+    assert result.errors == {}
+    assert set(result.outputs) == {'gdp_hp_trend', 'gdp_hp_cycle', 'real_interest_rate'}
+    np.testing.assert_allclose(result.outputs['gdp_hp_cycle'].values,
+                               series['gdp'].values - result.outputs['gdp_hp_trend'].values)
+    # Only the 30 years both rates are observed
+    np.testing.assert_allclose(result.outputs['real_interest_rate'].values, 20.0 - series['inflation'].values)
+    again = run_transforms(series, ['hp_cycle'], ['gdp'], workers=0)
+    assert again.cached == {'gdp_hp_trend', 'gdp_hp_cycle'}
+
+
+def test_failures_propagate_to_dependents_only(series):
+    series = {**series, 'short': annual([1.0, 2.0, 3.0])}
+    result = run_transforms(series, ['hp_cycle'], ['gdp', 'short'], workers=0)
+    assert result.errors['short_hp_trend'].startswith('ValueError: needs more than 4 observations')
+    assert result.errors['short_hp_cycle'] == 'missing input: short_hp_trend'
+    assert 'gdp_hp_cycle' in result.outputs
+
+
+def test_pool_transforms_match_in_process(series, monkeypatch):
+    in_process = run_transforms(series, ['bk_cycle', 'cf_cycle', 'yoy'], ['gdp'], workers=0)
+    transforms._memo.clear()
+    monkeypatch.setattr(shared_cache, '_cache', shared_cache.MemoryCache())
+    pooled = run_transforms(series, ['bk_cycle', 'cf_cycle', 'yoy'], ['gdp'], workers=2)
+    assert pooled.errors == {} and pooled.cached == set()
+    assert transforms._pool is not None
+    assert set(pooled.outputs) == {'gdp_bk_cycle', 'gdp_cf_cycle', 'gdp_yoy'}
+    for output, value in in_process.outputs.items():
+        np.testing.assert_array_equal(pooled.outputs[output].dates, value.dates)
+        np.testing.assert_allclose(pooled.outputs[output].values, value.values)
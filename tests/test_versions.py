@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pandas as pd
+import pytest
+
+import versions
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Records a changed version for each indicator, as an ingest run or app replica would
+WRITER = textwrap.dedent('''
+    import sys
+    import pandas as pd
+    import versions
+
+    country, count = sys.argv[1], int(sys.argv[2])
+    for i in range(count):
+        df = pd.DataFrame({'date': pd.to_datetime(['2020-01-01']), 'value': [float(i)]})
+        versions.record(country, f'indicator{i}', df, f'stamp{i}')
+''')
+
+
+@pytest.fixture
+def versions_path(tmp_path, monkeypatch):
+    path = tmp_path / 'data' / 'versions.json'
+    monkeypatch.setattr(versions, 'VERSIONS_PATH', str(path))
+    monkeypatch.setattr(versions, '_state', None)
+    monkeypatch.setattr(versions, '_seen', None)
+    return path
+
+
+def frame(value):
+    return pd.DataFrame({'date': pd.to_datetime(['2020-01-01', '2021-01-01']), 'value': [1.0, value]})
+
+
+def test_generation_only_moves_on_content_change(versions_path):
+    assert versions.record('Ghana', 'GDP', frame(2.0), 'a') == (versions.frame_version(frame(2.0)), True)
+    assert not versions.record('Ghana', 'GDP', frame(2.0), 'b')[1]
+    assert versions.last_updated('Ghana', 'GDP') == 'b'
+    assert versions.generation() == 1
+    versions.record('Kenya', 'GDP', frame(3.0))
+    assert versions.changed_since(1) == {('Kenya', 'GDP'): versions.frame_version(frame(3.0))}
+    assert versions.changed_since(0, 'Ghana') == {('Ghana', 'GDP'): versions.frame_version(frame(2.0))}
+
+
+def test_two_writer_processes_never_share_a_generation(versions_path):
+    count = 25
+    env = {**os.environ, 'PYTHONPATH': REPO}
+    writers = [
+        subprocess.Popen([sys.executable, '-c', WRITER, country, str(count)], cwd=versions_path.parent.parent, env=env)
+        for country in ('Ghana', 'Kenya')
+    ]
+    assert [writer.wait(timeout=120) for writer in writers] == [0, 0]
+    state = versions._read_disk()
+    generations = [entry['generation'] for entry in state['series'].values()]
+    assert len(state['series']) == 2 * count
+    assert sorted(generations) == list(range(1, 2 * count + 1))
+    assert versions.generation() == 2 * count
+    assert len(versions.changed_since(0)) == 2 * count
+    assert len(versions.changed_since(count, 'Kenya')) + len(versions.changed_since(count, 'Ghana')) == count
@@ -0,0 +1,302 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+import numpy as np
+import pandas as pd
+
+from array_series import ArraySeries
+from decomposition import HP_LAMBDA, hp_filter_memoized
+from metrics import cache_result, increment, observe
+from shared_cache import get_cache
+
+# Worker processes computing derived indicators; 0 computes them in the calling process
+TRANSFORM_WORKERS = int(os.environ.get('ECONCENTR_TRANSFORM_WORKERS', '2'))
+
+# Number of transform outputs kept in memory
+TRANSFORM_CACHE_SIZE = 512
+
+# Seconds a transform output stays in the shared cache
+TRANSFORM_CACHE_TTL = int(os.environ.get('ECONCENTR_TRANSFORM_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Outputs, per-output compute seconds, per-output error messages and the outputs served from cache
+TransformResult = namedtuple('TransformResult', ['outputs', 'timings', 'errors', 'cached'])
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _as_pandas(series):
+    return pd.Series(series.values, index=pd.DatetimeIndex(series.dates))
+
+
+def _from_pandas(values):
+    return ArraySeries(values.index.to_numpy(dtype='datetime64[ns]'), values.to_numpy(dtype='float64'))
+
+
+# Two series restricted to the dates they share
+def _aligned(left, right):
+    joined = pd.concat([_as_pandas(left.dropna()), _as_pandas(right.dropna())], axis=1, join='inner')
+    return joined.index.to_numpy(dtype='datetime64[ns]'), joined[0].to_numpy(), joined[1].to_numpy()
+
+
+# Observations per year of a series, from the median spacing of its dates
+def _per_year(series):
+    if len(series) < 2:
+        return 1
+    days = np.median(np.diff(series.dates).astype('timedelta64[D]').astype('float64'))
+    return max(1, int(round(365.25 / days)))
+
+
+# Percentage change on the value one year earlier; works at any frequency
+def yoy_change(series):
+    values = _as_pandas(series)
+    prior = values.shift(freq=pd.DateOffset(years=1)).reindex(values.index)
+    return _from_pandas((values / prior - 1) * 100)
+
+
+# Mean over the last `window` observations
+def rolling_mean(series, window=3):
+    return ArraySeries(series.dates, _as_pandas(series).rolling(window, min_periods=window).mean().to_numpy())
+
+
+# Hodrick-Prescott trend of the non-missing observations
+def hp_trend(series, lamb=HP_LAMBDA):
+    dense = series.dropna()
+    if len(dense) <= 4:
+        raise ValueError(f"needs more than 4 observations, has {len(dense)}")
+    cycle, trend = hp_filter_memoized({'value': dense.values}, lamb=lamb)['value']
+    return ArraySeries(dense.dates, trend)
+
+
+# Deviation of a series from its trend
+def hp_cycle(series, trend):
+    dates, values, trend_values = _aligned(series, trend)
+    return ArraySeries(dates, values - trend_values)
+
+
+# Baxter-King band-pass cycle for periods between low and high years, with a moving
+# average of K years on each side (so K years are lost at both ends)
+def bk_cycle(series, low=2, high=8, K=3):
+    from statsmodels.tsa.filters.bk_filter import bkfilter
+    dense = series.dropna()
+    per_year = _per_year(dense)
+    K = K * per_year
+    if len(dense) <= 2 * K:
+        raise ValueError(f"needs more than {2 * K} observations, has {len(dense)}")
+    cycle = bkfilter(dense.values, low=max(2, low * per_year), high=high * per_year, K=K)
+    return ArraySeries(dense.dates[K:len(dense) - K], np.ravel(cycle))
+
+
+# Christiano-Fitzgerald asymmetric band-pass cycle for periods between low and high years
+def cf_cycle(series, low=2, high=8):
+    from statsmodels.tsa.filters.cf_filter import cffilter
+    dense = series.dropna()
+    per_year = _per_year(dense)
+    if len(dense) <= 4:
+        raise ValueError(f"needs more than 4 observations, has {len(dense)}")
+    cycle, trend = cffilter(dense.values, low=max(2, low * per_year), high=high * per_year, drift=True)
+    return ArraySeries(dense.dates, np.ravel(cycle))
+
+
+# Nominal lending rate minus inflation on the dates both are observed
+def real_interest_rate(lending_rate, inflation):
+    dates, nominal, prices = _aligned(lending_rate, inflation)
+    return ArraySeries(dates, nominal - prices)
+
+
+# Derived indicators. Each transform's function takes its input series in order, plus
+# params, and returns an ArraySeries. Inputs containing {indicator} make a transform
+# apply to every indicator, with output <indicator>_<transform>; other transforms have
+# one output named after the transform. An input can be another transform's output,
+# which makes it a dependency. Transforms marked pool run in worker processes; the
+# rest take about a millisecond and run in the calling process, where shipping the
+# arrays to a worker would cost more than the work.
+TRANSFORMS = {
+    'yoy': {'function': yoy_change, 'inputs': ('{indicator}',), 'params': {}, 'pool': False, 'label': 'YoY Change (%)'},
+    'rolling_mean': {'function': rolling_mean, 'inputs': ('{indicator}',), 'params': {'window': 3}, 'pool': False, 'label': '3-Period Rolling Mean'},
+    'hp_trend': {'function': hp_trend, 'inputs': ('{indicator}',), 'params': {'lamb': HP_LAMBDA}, 'pool': False, 'label': 'HP Trend'},
+    'hp_cycle': {'function': hp_cycle, 'inputs': ('{indicator}', '{indicator}_hp_trend'), 'params': {}, 'pool': False, 'label': 'HP Cycle'},
+    'bk_cycle': {'function': bk_cycle, 'inputs': ('{indicator}',), 'params': {'low': 2, 'high': 8, 'K': 3}, 'pool': True, 'label': 'Baxter-King Cycle'},
+    'cf_cycle': {'function': cf_cycle, 'inputs': ('{indicator}',), 'params': {'low': 2, 'high': 8}, 'pool': True, 'label': 'Christiano-Fitzgerald Cycle'},
+    'real_interest_rate': {'function': real_interest_rate, 'inputs': ('lending_rate', 'inflation'), 'params': {}, 'pool': False, 'label': 'Real Interest Rate'}
+}
+
+
+def _per_indicator(name):
+    return any('{indicator}' in item for item in TRANSFORMS[name]['inputs'])
+
+
+# Every output the registry can derive from the given indicators: {output: (transform, inputs)}
+def _candidates(indicators):
+    candidates = {}
+    for name, spec in TRANSFORMS.items():
+        if _per_indicator(name):
+            for indicator in indicators:
+                candidates[f'{indicator}_{name}'] = (name, tuple(item.format(indicator=indicator) for item in spec['inputs']))
+        else:
+            candidates[name] = (name, spec['inputs'])
+    return candidates
+
+
+# Output names of the requested transforms. Per-indicator transforms produce one output
+# for every available indicator unless indicators narrows them down.
+def targets(requested, available, indicators=None):
+    unknown = [name for name in requested if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Unknown transform(s): {', '.join(unknown)}")
+    outputs = []
+    for name in requested:
+        if _per_indicator(name):
+            outputs.extend(f'{indicator}_{name}' for indicator in (indicators or available) if indicator in available)
+        else:
+            outputs.append(name)
+    return outputs
+
+
+# Outputs of the requested transforms plus everything they depend on: {output: (transform, inputs)}
+def plan(requested, available, indicators=None):
+    candidates = _candidates(list(available))
+    nodes = {}
+    stack = targets(requested, available, indicators)
+    while stack:
+        output = stack.pop()
+        if output in nodes or output in available or output not in candidates:
+            continue
+        nodes[output] = candidates[output]
+        stack.extend(nodes[output][1])
+    return nodes
+
+
+# Process pool shared by every session; workers are spawned rather than forked so they
+# never inherit the server's threads and locks
+def get_pool(workers=TRANSFORM_WORKERS):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Runs in a worker: (output, seconds, error message)
+def _execute(name, inputs, params):
+    start = time.perf_counter()
+    try:
+        output = TRANSFORMS[name]['function'](*inputs, **params)
+        return output, time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+# Content address of a transform applied to inputs with params
+def cache_key(name, inputs, params):
+    digest = hashlib.sha256(name.encode('utf-8'))
+    digest.update(repr(sorted(params.items())).encode('utf-8'))
+    for series in inputs:
+        digest.update(series.version.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _cache_get(key):
+    with _memo_lock:
+        output = _memo.get(key)
+        if output is not None:
+            _memo.move_to_end(key)
+    if output is None:
+        try:
+            entry = get_cache().get(f'transform:{key}')
+            stored = ArraySeries.from_arrays(entry.value) if entry is not None else None
+        except Exception:
+            stored = None
+        if stored is not None:
+            output = _cache_put(key, stored, persist=False)
+    cache_result('transform', output is not None)
+    return output
+
+
+def _cache_put(key, output, persist=True):
+    with _memo_lock:
+        _memo[key] = output
+        _memo.move_to_end(key)
+        while len(_memo) > TRANSFORM_CACHE_SIZE:
+            _memo.popitem(last=False)
+    if persist:
+        try:
+            get_cache().set(f'transform:{key}', output.to_arrays(), TRANSFORM_CACHE_TTL)
+        except Exception:
+            pass
+    return output
+
+
+# Compute the requested transforms over a country's series ({name: ArraySeries}).
+# Outputs are computed in dependency order; pool transforms whose inputs are ready are
+# all submitted at once, and results are cached by transform, params and input
+# content. A failing transform is reported in errors together with everything that
+# depends on it; the rest still run. params optionally overrides a transform's params,
+# e.g. {'hp_trend': {'lamb': 100}}.
+def run_transforms(series, requested, indicators=None, params=None, workers=TRANSFORM_WORKERS):
+    nodes = plan(requested, series, indicators)
+    params = params or {}
+    outputs, timings, errors, cached = {}, {}, {}, set()
+    graph = TopologicalSorter({output: [item for item in inputs if item in nodes] for output, (name, inputs) in nodes.items()})
+    graph.prepare()
+    pending = {}
+    while graph.is_active():
+        # Hand work to the pool first so it overlaps with the in-process transforms
+        for output in sorted(graph.get_ready(), key=lambda output: not TRANSFORMS[nodes[output][0]]['pool']):
+            name, input_names = nodes[output]
+            missing = [item for item in input_names if item not in series and item not in outputs]
+            if missing:
+                errors[output] = f"missing input: {', '.join(missing)}"
+                graph.done(output)
+                continue
+            inputs = [series[item] if item in series else outputs[item] for item in input_names]
+            transform_params = {**TRANSFORMS[name]['params'], **params.get(name, {})}
+            key = cache_key(name, inputs, transform_params)
+            hit = _cache_get(key)
+            if hit is not None:
+                outputs[output] = hit
+                cached.add(output)
+                graph.done(output)
+                continue
+            if workers and TRANSFORMS[name]['pool']:
+                future = get_pool(workers).submit(_execute, name, inputs, transform_params)
+            else:
+                future = Future()
+                future.set_result(_execute(name, inputs, transform_params))
+            pending[future] = (output, name, key)
+        if not pending:
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            output, name, key = pending.pop(future)
+            try:
+                value, seconds, error = future.result()
+            except Exception as e:
+                # The pool itself failed (e.g. a worker was killed); start a new one next time
+                value, seconds, error = None, 0.0, f"{type(e).__name__}: {e}"
+                _reset_pool()
+            timings[output] = seconds
+            observe('transform', seconds, transform=name)
+            if error is None:
+                outputs[output] = _cache_put(key, value)
+            else:
+                errors[output] = error
+                increment('transform_errors', transform=name)
+            graph.done(output)
+    return TransformResult(outputs, timings, errors, cached)
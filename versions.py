@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from persistence import atomic_write, file_lock
+
+# Per-series versions and FRED last_updated stamps, kept between runs
+VERSIONS_PATH = os.path.join('data', 'versions.json')
+
+_state = None
+_seen = None
+_lock = threading.Lock()
+
+
+# Content hash of a date/<column> frame
+def frame_version(df, column='value'):
+    digest = hashlib.sha256(df['date'].to_numpy(dtype='datetime64[ns]').view('int64').tobytes())
+    digest.update(np.ascontiguousarray(df[column].to_numpy(dtype='float64')).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _key(country, indicator):
+    return f'{country}/{indicator}'
+
+
+def _empty():
+    return {'generation': 0, 'series': {}}
+
+
+def _stat():
+    try:
+        stat = os.stat(VERSIONS_PATH)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_disk():
+    try:
+        with open(VERSIONS_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return _empty()
+
+
+# versions.json is the single source of truth, shared by every process (app replicas,
+# ingest runs). This process keeps a copy and rereads it whenever the file changes.
+def _load():
+    global _state, _seen
+    seen = _stat()
+    if _state is None or seen != _seen:
+        _state = _read_disk()
+        _seen = seen
+    return _state
+
+
+def _serialize(state):
+    return json.dumps(state, indent=2, sort_keys=True).encode('utf-8')
+
+
+# Record the content of a series after a sync, with FRED's last_updated stamp when known.
+# A new content version takes the next global generation. The read-modify-write runs under
+# a lock shared by every process and starts from the file, so two processes never hand out
+# the same generation and never drop each other's entries. Returns (version, changed).
+def record(country, indicator, df, last_updated=None):
+    global _state, _seen
+    version = frame_version(df)
+    with _lock, file_lock(VERSIONS_PATH):
+        state = _read_disk()
+        entry = state['series'].get(_key(country, indicator), {})
+        changed = entry.get('version') != version
+        if not changed and (last_updated is None or entry.get('last_updated') == last_updated):
+            return version, False
+        if changed:
+            state['generation'] += 1
+            entry = {'version': version, 'generation': state['generation']}
+        if last_updated is not None:
+            entry['last_updated'] = last_updated
+        state['series'][_key(country, indicator)] = entry
+        atomic_write(VERSIONS_PATH, _serialize(state))
+        _state, _seen = state, _stat()
+    return version, changed
+
+
+# FRED's last_updated stamp seen at the series' last sync, or None
+def last_updated(country, indicator):
+    with _lock:
+        return _load()['series'].get(_key(country, indicator), {}).get('last_updated')
+
+
+# Current content version of a series, or None if it was never synced
+def version(country, indicator):
+    with _lock:
+        return _load()['series'].get(_key(country, indicator), {}).get('version')
+
+
+# Counter that increases whenever any series changes
+def generation():
+    with _lock:
+        return _load()['generation']
+
+
+# Series that changed after the given generation, as {(country, indicator): version}
+def changed_since(since, country=None):
+    with _lock:
+        series = dict(_load()['series'])
+    changed = {}
+    for key, entry in series.items():
+        series_country, indicator = key.split('/', 1)
+        if entry['generation'] > since and country in (None, series_country):
+            changed[(series_country, indicator)] = entry['version']
+    return changed
+